@@ -2,24 +2,83 @@
 高级使用示例 - OpenAI Billing Monitor
 """
 
+import io
 import os
 import time
 import asyncio
+from bisect import bisect_right
 from typing import List, Dict, Any
 import openai
-from openai_billing import BillingMonitor, OpenAIWrapper, monitor_openai_call
+from openai_billing import OpenAIWrapper, monitor_openai_call, get_global_monitor
 from openai_billing.models import ModelConfig, ThresholdConfig
-from openai_billing.core.exceptions import ThresholdExceededException
+from openai_billing.core.exceptions import (
+    BillingException,
+    ThresholdExceededException,
+    TokenCountingException,
+)
+
+
+def estimate_text_tokens(monitor, text: str, model: str, fast_estimate: bool = False) -> int:
+    """估算文本的token数
+
+    默认使用监控器自带的TokenCounter（tiktoken，编码器会被缓存）；
+    fast_estimate=True 或编码器不可用时，退化为按UTF-8字节数/4的粗略估算。
+    """
+    if not fast_estimate:
+        try:
+            return monitor.token_counter.count_tokens(text, model)
+        except TokenCountingException:
+            pass
+    return len(text.encode("utf-8")) >> 2
+
+
+class TokenBucket:
+    """令牌桶限速器：平均速率为rate次/秒，最多允许capacity次突发"""
+    
+    def __init__(self, rate: float = 5.0, capacity: float = 10.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+    
+    def _reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数（令牌不足时记为欠额）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+    
+    def acquire(self) -> None:
+        """同步获取一个令牌"""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self) -> None:
+        """异步获取一个令牌（预留在await之前完成，因此无需加锁）"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
 
 
 class ChatBot:
     """示例聊天机器人类，集成计费监控"""
     
-    def __init__(self, model_name: str = "gpt-3.5-turbo"):
+    def __init__(self, model_name: str = "gpt-3.5-turbo", max_history: int = 20,
+                 system_prompt: str = "You are a helpful assistant.",
+                 summary_model: str = "gpt-4o-mini"):
         self.model_name = model_name
         self.client = OpenAIWrapper()
         self.conversation_history = []
         
+        # 历史消息上限：超过后把较早的一半压缩成摘要，避免每轮请求的token数持续增长
+        self.max_history = max_history
+        self.summary_model = summary_model
+        self.summary_buffer = ""
+        # 固定不变的系统消息放在最前面，作为可被缓存的稳定前缀
+        self.system_message = {"role": "system", "content": system_prompt}
+        
         # 设置回调函数
         self.setup_callbacks()
     
@@ -38,14 +97,52 @@ class ChatBot:
             on_exceeded=on_exceeded
         )
     
+    def _build_messages(self) -> List[Dict[str, str]]:
+        """组装请求消息：稳定的系统消息 + 历史摘要 + 最近的对话"""
+        messages = [self.system_message]
+        if self.summary_buffer:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {self.summary_buffer}"
+            })
+        messages.extend(self.conversation_history)
+        return messages
+    
+    def _compact(self) -> None:
+        """把较早的一半历史消息压缩成不超过200 token的摘要"""
+        cutoff = self.max_history // 2
+        old_messages = self.conversation_history[:cutoff]
+        del self.conversation_history[:cutoff]
+        
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in old_messages)
+        if self.summary_buffer:
+            transcript = f"Previous summary: {self.summary_buffer}\n{transcript}"
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": "Summarize this conversation in under 200 tokens, "
+                                                  "keeping facts the assistant needs later."},
+                    {"role": "user", "content": transcript}
+                ],
+                max_tokens=200
+            )
+            self.summary_buffer = response.choices[0].message.content
+        except Exception as e:
+            # 摘要失败时只保留滑动窗口，较早的消息直接丢弃
+            print(f"⚠️ 压缩对话历史失败: {e}")
+    
     def chat(self, message: str) -> str:
         """聊天方法，自动监控成本"""
         self.conversation_history.append({"role": "user", "content": message})
+        if len(self.conversation_history) > self.max_history:
+            self._compact()
         
         try:
             response = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=self.conversation_history,
+                messages=self._build_messages(),
                 max_tokens=150
             )
             
@@ -67,58 +164,104 @@ class ChatBot:
 class BatchProcessor:
     """批量处理示例，带有成本控制"""
     
+    SYSTEM_PROMPT = "You are a helpful assistant that summarizes text."
+    
     def __init__(self):
-        self.monitor = BillingMonitor()
+        self.monitor = get_global_monitor()
         self.client = openai.OpenAI()
+        self.async_client = openai.AsyncOpenAI()
+        # 替代固定的sleep(1)：平均每秒5个请求，允许10个突发
+        self.rate_limiter = TokenBucket(rate=5.0, capacity=10.0)
     
     @monitor_openai_call()
     def process_single_item(self, text: str, model: str = "gpt-3.5-turbo") -> str:
         """处理单个项目"""
+        self.rate_limiter.acquire()
         response = self.client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes text."},
+                {"role": "system", "content": self.SYSTEM_PROMPT},
                 {"role": "user", "content": f"Summarize this text: {text}"}
             ],
             max_tokens=100
         )
         return response.choices[0].message.content
     
-    def process_batch(self, texts: List[str], model: str = "gpt-3.5-turbo") -> List[str]:
+    async def process_batch_async(self, texts: List[str], model: str = "gpt-3.5-turbo",
+                                  concurrency: int = 5,
+                                  fast_estimate: bool = False) -> List[Any]:
+        """
+        并发批量处理，最多同时发出concurrency个请求
+        
+        返回与texts一一对应的列表：成功时为摘要文本，失败时为异常对象
+        （被预检查拦截的项目为BillingException）。一旦某个请求超出硬限制，
+        该项目为ThresholdExceededException，其余未完成的项目被取消
+        （为asyncio.CancelledError）。
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: List[asyncio.Task] = []
+        
+        async def process_one(text: str) -> str:
+            async with semaphore:
+                # 预检查只能看到已完成请求记录的用量：同时在途的请求（最多
+                # concurrency个）都会通过检查，所以超限由下面的track_usage兜底
+                estimated_tokens = estimate_text_tokens(self.monitor, text, model, fast_estimate)
+                check_result = self.monitor.check_limits_before_request(model, estimated_tokens)
+                if not check_result["allowed"]:
+                    messages = [w["message"] for w in check_result.get("warnings", [])]
+                    raise BillingException("; ".join(messages) or "超出限制")
+                
+                await self.rate_limiter.acquire_async()
+                response = await self.async_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": self.SYSTEM_PROMPT},
+                        {"role": "user", "content": f"Summarize this text: {text}"}
+                    ],
+                    max_tokens=100
+                )
+                # 装饰器只支持同步函数，这里手动记录用量；超出硬限制时
+                # track_usage抛出ThresholdExceededException，停止整个批次
+                usage = response.usage
+                details = getattr(usage, "prompt_tokens_details", None)
+                try:
+                    self.monitor.track_usage(
+                        model, usage.prompt_tokens, usage.completion_tokens or 0,
+                        cached_input_tokens=getattr(details, "cached_tokens", None) or 0
+                    )
+                except ThresholdExceededException:
+                    for task in tasks:
+                        if task is not asyncio.current_task():
+                            task.cancel()
+                    raise
+                return response.choices[0].message.content
+        
+        tasks.extend(asyncio.ensure_future(process_one(text)) for text in texts)
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def process_batch(self, texts: List[str], model: str = "gpt-3.5-turbo",
+                      fast_estimate: bool = False, concurrency: int = 5) -> List[str]:
         """批量处理，带有成本控制"""
         results = []
-        total_estimated_cost = 0
+        outcomes = asyncio.run(
+            self.process_batch_async(texts, model, concurrency, fast_estimate)
+        )
         
-        for i, text in enumerate(texts):
-            # 预估成本
-            estimated_tokens = len(text.split()) * 1.3  # 粗略估算
-            check_result = self.monitor.check_limits_before_request(model, int(estimated_tokens))
-            
-            if not check_result["allowed"]:
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, ThresholdExceededException):
+                print(f"🚫 处理第{i+1}个项目时超出限制: {outcome}")
+            elif isinstance(outcome, asyncio.CancelledError):
+                print(f"⏹️ 第{i+1}个项目已取消，原因: 批次已超出限制")
+            elif isinstance(outcome, BillingException):
                 print(f"⚠️ 第{i+1}个项目被跳过，原因: 超出限制")
-                warnings = check_result.get("warnings", [])
-                for warning in warnings:
-                    print(f"   {warning['message']}")
-                continue
-            
-            try:
-                result = self.process_single_item(text, model)
-                results.append(result)
-                total_estimated_cost += check_result["estimated_cost"]
-                
+                print(f"   {outcome}")
+            elif isinstance(outcome, Exception):
+                print(f"❌ 处理第{i+1}个项目时出错: {outcome}")
+            else:
+                results.append(outcome)
                 print(f"✅ 处理完成第{i+1}/{len(texts)}个项目")
-                print(f"   预估累计成本: ${total_estimated_cost:.4f}")
-                
-                # 添加延迟避免速率限制
-                time.sleep(1)
-                
-            except ThresholdExceededException as e:
-                print(f"🚫 处理第{i+1}个项目时超出限制: {e}")
-                break
-            except Exception as e:
-                print(f"❌ 处理第{i+1}个项目时出错: {e}")
-                continue
         
+        print(f"   今日累计成本: ${self.monitor.get_usage_summary()['daily_cost']:.4f}")
         return results
 
 
@@ -126,9 +269,10 @@ class ModelComparison:
     """模型成本比较工具"""
     
     def __init__(self):
-        self.monitor = BillingMonitor()
+        self.monitor = get_global_monitor()
     
-    def compare_models(self, prompt: str, models: List[str]) -> Dict[str, Dict[str, Any]]:
+    def compare_models(self, prompt: str, models: List[str],
+                       fast_estimate: bool = False) -> Dict[str, Dict[str, Any]]:
         """比较不同模型的成本和响应"""
         results = {}
         
@@ -141,9 +285,12 @@ class ModelComparison:
                 print(f"⚠️ 模型 {model} 未配置，跳过")
                 continue
             
-            # 估算成本
-            estimated_tokens = len(prompt.split()) * 1.5
-            estimated_cost = self.monitor.estimate_cost(model, int(estimated_tokens), int(estimated_tokens))
+            # 估算成本（直接使用已取到的价格，避免再次查找模型配置）
+            estimated_tokens = estimate_text_tokens(self.monitor, prompt, model, fast_estimate)
+            estimated_cost = (
+                estimated_tokens * model_config.input_token_price
+                + estimated_tokens * model_config.output_token_price
+            ) / 1000
             
             results[model] = {
                 "estimated_cost": estimated_cost,
@@ -156,72 +303,84 @@ class ModelComparison:
             print(f"   输入价格: ${model_config.input_token_price:.6f}/1K tokens")
             print(f"   输出价格: ${model_config.output_token_price:.6f}/1K tokens")
         
-        # 排序并显示最经济的选择
+        # 显示最经济的选择（只需最小值，无需整体排序）
         if results:
-            sorted_models = sorted(results.items(), key=lambda x: x[1]["estimated_cost"])
-            print(f"\n💰 最经济的模型: {sorted_models[0][0]} (${sorted_models[0][1]['estimated_cost']:.6f})")
+            cheapest = min(results, key=lambda name: results[name]["estimated_cost"])
+            print(f"\n💰 最经济的模型: {cheapest} (${results[cheapest]['estimated_cost']:.6f})")
         
         return results
 
 
-class CostTracker:
-    """成本跟踪和报告工具"""
-    
-    def __init__(self):
-        self.monitor = BillingMonitor()
-    
-    def generate_report(self) -> str:
-        """生成使用报告"""
-        summary = self.monitor.get_usage_summary()
-        
-        report = f"""
+# 报告模板在模块加载时定义一次，字段直接取自 get_usage_summary() 的结果
+REPORT_HEADER_TEMPLATE = """
 📊 OpenAI 使用报告
-{'=' * 50}
+==================================================
 
 💰 成本统计:
-   总成本:     ${summary.get('total_cost', 0):.4f}
-   今日成本:   ${summary.get('daily_cost', 0):.4f}
-   本月成本:   ${summary.get('monthly_cost', 0):.4f}
+   总成本:     ${total_cost:.4f}
+   今日成本:   ${daily_cost:.4f}
+   本月成本:   ${monthly_cost:.4f}
 
 🔢 Token统计:
-   总输入:     {summary.get('total_input_tokens', 0):,}
-   总输出:     {summary.get('total_output_tokens', 0):,}
-   今日输入:   {summary.get('daily_input_tokens', 0):,}
-   今日输出:   {summary.get('daily_output_tokens', 0):,}
+   总输入:     {total_input_tokens:,}
+   总输出:     {total_output_tokens:,}
+   今日输入:   {daily_input_tokens:,}
+   今日输出:   {daily_output_tokens:,}
+   缓存命中:   {total_cached_input_tokens:,}
 
 📞 请求统计:
-   总请求数:   {summary.get('total_requests', 0):,}
+   总请求数:   {total_requests:,}
 
 📅 时间信息:
-   上次重置:   {summary.get('last_reset_date', 'N/A')}
-   日重置:     {summary.get('last_daily_reset', 'N/A')}
-   月重置:     {summary.get('last_monthly_reset', 'N/A')}
+   上次重置:   {last_reset_date}
+   日重置:     {last_daily_reset}
+   月重置:     {last_monthly_reset}
 
 ⚠️ 限制状态:
 """
+
+# 限制状态行：(summary字段前缀, 显示名称)
+REPORT_LIMIT_ROWS = [
+    ("daily_cost", "日成本限制"),
+    ("monthly_cost", "月成本限制"),
+]
+
+# 使用百分比分段边界及对应的状态图标：<80 / 80~100 / >=100
+REPORT_STATUS_EDGES = (80.0, 100.0)
+REPORT_STATUS_ICONS = ("🟢", "🟡", "🔴")
+
+
+class CostTracker:
+    """成本跟踪和报告工具"""
+    
+    def __init__(self):
+        self.monitor = get_global_monitor()
+    
+    def generate_report(self) -> str:
+        """生成使用报告"""
+        summary = self.monitor.get_usage_summary()
         
-        # 添加限制状态
-        if summary.get('daily_cost_limit'):
-            daily_percent = summary.get('daily_cost_usage_percent', 0)
-            status = "🔴" if daily_percent >= 100 else "🟡" if daily_percent >= 80 else "🟢"
-            report += f"   日成本限制: {status} {daily_percent:.1f}% (${summary['daily_cost_limit']:.2f})\n"
+        report = io.StringIO()
+        report.write(REPORT_HEADER_TEMPLATE.format_map(summary))
         
-        if summary.get('monthly_cost_limit'):
-            monthly_percent = summary.get('monthly_cost_usage_percent', 0)
-            status = "🔴" if monthly_percent >= 100 else "🟡" if monthly_percent >= 80 else "🟢"
-            report += f"   月成本限制: {status} {monthly_percent:.1f}% (${summary['monthly_cost_limit']:.2f})\n"
+        # 添加限制状态
+        for prefix, label in REPORT_LIMIT_ROWS:
+            limit = summary.get(f"{prefix}_limit")
+            if not limit:
+                continue
+            percent = summary.get(f"{prefix}_usage_percent", 0)
+            status = REPORT_STATUS_ICONS[bisect_right(REPORT_STATUS_EDGES, percent)]
+            report.write(f"   {label}: {status} {percent:.1f}% (${limit:.2f})\n")
         
-        return report
+        return report.getvalue()
     
     def export_data(self, filename: str):
         """导出数据到文件"""
-        import json
-        
         summary = self.monitor.get_usage_summary()
         config_data = {
             "export_time": time.strftime("%Y-%m-%d %H:%M:%S"),
             "usage_summary": summary,
-            "models_configured": list(self.monitor.config.models.keys()),
+            "models_configured": tuple(self.monitor.config.models),
             "thresholds": {
                 "daily_cost_limit": self.monitor.config.thresholds.daily_cost_limit,
                 "monthly_cost_limit": self.monitor.config.thresholds.monthly_cost_limit,
@@ -231,8 +390,21 @@ class CostTracker:
             }
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=2, ensure_ascii=False, default=str)
+        try:
+            # orjson（可选依赖）直接输出UTF-8字节，比标准库json快得多
+            import orjson
+            
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(
+                    config_data,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                    default=str
+                ))
+        except ImportError:
+            import json
+            
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(config_data, f, indent=2, ensure_ascii=False, default=str)
         
         print(f"📁 数据已导出到: {filename}")
 
@@ -333,7 +505,7 @@ def example_custom_configuration():
     print("\n=== 自定义配置示例 ===")
     
     try:
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         
         # 添加自定义模型
         custom_models = [
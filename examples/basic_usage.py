@@ -4,7 +4,7 @@
 
 import os
 import openai
-from openai_billing import monitor_openai_call, OpenAIWrapper, BillingMonitor
+from openai_billing import monitor_openai_call, OpenAIWrapper, get_global_monitor
 
 
 def example_1_decorator():
@@ -29,7 +29,7 @@ def example_1_decorator():
         print(f"Response: {response.choices[0].message.content}")
         
         # 查看使用统计
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         summary = monitor.get_usage_summary()
         print(f"Total cost so far: ${summary['total_cost']:.4f}")
         
@@ -71,7 +71,7 @@ def example_3_manual_monitoring():
     
     try:
         # 创建监控器
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         
         # 正常的OpenAI调用
         client = openai.OpenAI()
@@ -93,6 +93,7 @@ def example_3_manual_monitoring():
         print(f"This call cost: ${usage_info['cost']:.4f}")
         print(f"Input tokens: {usage_info['input_tokens']}")
         print(f"Output tokens: {usage_info['output_tokens']}")
+        print(f"Cached input tokens: {usage_info['cached_input_tokens']}")
         
     except Exception as e:
         print(f"Error: {e}")
@@ -105,7 +106,7 @@ def example_4_configuration():
     try:
         from openai_billing.models import ThresholdConfig, ModelConfig
         
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         
         # 设置阈值
         thresholds = ThresholdConfig(
@@ -141,7 +142,7 @@ def example_5_pre_check():
     print("\n=== 示例5: 预检查功能 ===")
     
     try:
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         
         # 检查请求是否会超限
         model_name = "gpt-3.5-turbo"
@@ -168,7 +169,7 @@ def example_6_callbacks():
     print("\n=== 示例6: 回调函数 ===")
     
     try:
-        monitor = BillingMonitor()
+        monitor = get_global_monitor()
         
         # 设置回调函数
         def on_warning(warning_type, usage_info):
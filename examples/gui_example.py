@@ -2,37 +2,38 @@
 GUI使用示例 - OpenAI Billing Monitor
 """
 
+import sys
 import tkinter as tk
 from tkinter import messagebox
-import threading
-import time
 
-from openai_billing import BillingMonitor
+from openai_billing import get_global_monitor
 from openai_billing.gui import BillingGUI
-from openai_billing.models import ModelConfig, ThresholdConfig
+from openai_billing.models import ModelConfig, ThresholdConfig, UsageStats
 
 
 def setup_demo_data():
     """设置演示数据"""
-    monitor = BillingMonitor()
+    monitor = get_global_monitor()
     
     # 添加一些模拟使用数据
     # 注意：这只是为了演示，实际使用中数据来自真实的API调用
     
     # 模拟一些使用
-    monitor.config.usage_stats.total_cost = 15.75
-    monitor.config.usage_stats.daily_cost = 2.30
-    monitor.config.usage_stats.monthly_cost = 8.90
-    monitor.config.usage_stats.total_requests = 45
-    monitor.config.usage_stats.request_count = 45  # 保持同步
-    monitor.config.usage_stats.daily_requests = 12
-    monitor.config.usage_stats.monthly_requests = 28
-    monitor.config.usage_stats.total_input_tokens = 12500
-    monitor.config.usage_stats.total_output_tokens = 8300
-    monitor.config.usage_stats.daily_input_tokens = 1800
-    monitor.config.usage_stats.daily_output_tokens = 1200
-    monitor.config.usage_stats.monthly_input_tokens = 5200
-    monitor.config.usage_stats.monthly_output_tokens = 3400
+    monitor.config.usage_stats = UsageStats(
+        total_cost=15.75,
+        daily_cost=2.30,
+        monthly_cost=8.90,
+        total_requests=45,
+        request_count=45,  # 保持同步
+        daily_requests=12,
+        monthly_requests=28,
+        total_input_tokens=12500,
+        total_output_tokens=8300,
+        daily_input_tokens=1800,
+        daily_output_tokens=1200,
+        monthly_input_tokens=5200,
+        monthly_output_tokens=3400
+    )
     
     # 设置一些阈值用于演示
     thresholds = ThresholdConfig(
@@ -51,7 +52,67 @@ def setup_demo_data():
     return monitor
 
 
-def create_demo_window():
+def _build_canvas_launcher(demo_root, buttons, title_text, subtitle_text, info_text):
+    """在单个Canvas上绘制启动界面，点击时按按钮区域分发"""
+    canvas = tk.Canvas(demo_root, width=400, height=300, highlightthickness=0)
+    canvas.pack(fill="both", expand=True)
+    
+    canvas.create_text(200, 35, text=title_text, font=("Arial", 16, "bold"))
+    canvas.create_text(200, 68, text=subtitle_text, font=("Arial", 10))
+    
+    # 预先计算每个按钮的矩形区域
+    hit_boxes = []
+    for i, (text, color, command) in enumerate(buttons):
+        x1, y1, x2, y2 = 40, 90 + i * 40, 360, 124 + i * 40
+        canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline=color)
+        canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text=text,
+                           font=("Arial", 11), fill="white")
+        hit_boxes.append((x1, y1, x2, y2, command))
+    
+    canvas.create_text(200, 275, text=info_text, font=("Arial", 8),
+                       fill="gray", justify="center")
+    
+    def dispatch(event):
+        for x1, y1, x2, y2, command in hit_boxes:
+            if x1 <= event.x <= x2 and y1 <= event.y <= y2:
+                command()
+                return
+    
+    canvas.bind("<Button-1>", dispatch)
+
+
+def _build_widget_launcher(demo_root, buttons, title_text, subtitle_text, info_text):
+    """使用普通Tk控件构建启动界面（--legacy-widgets）"""
+    tk.Label(demo_root, text=title_text, font=("Arial", 16, "bold"), pady=20).pack()
+    tk.Label(demo_root, text=subtitle_text, font=("Arial", 10), pady=10).pack()
+    
+    # 按钮框架
+    button_frame = tk.Frame(demo_root)
+    button_frame.pack(expand=True, fill="both", padx=40, pady=20)
+    
+    for text, color, command in buttons:
+        tk.Button(
+            button_frame,
+            text=text,
+            font=("Arial", 11),
+            command=command,
+            height=2,
+            bg=color,
+            fg="white",
+            relief="raised"
+        ).pack(fill="x", pady=5)
+    
+    # 说明文本
+    tk.Label(
+        demo_root,
+        text=info_text,
+        font=("Arial", 8),
+        fg="gray",
+        pady=10
+    ).pack(side="bottom")
+
+
+def create_demo_window(legacy_widgets: bool = False):
     """创建演示窗口"""
     
     def start_gui():
@@ -75,38 +136,35 @@ def create_demo_window():
             # 创建GUI
             app = BillingGUI(monitor)
             
-            # 启动模拟数据更新线程
+            # 在Tk事件循环中定时模拟数据更新（无需后台线程和锁）
+            stats = app.billing_monitor.config.usage_stats
+            flush_pending = False
+            
+            def flush_usage_stats():
+                """把一段时间内累积的变化一次性写入磁盘（只写使用统计）"""
+                nonlocal flush_pending
+                flush_pending = False
+                app.billing_monitor.config_manager.save_usage_stats(stats)
+            
             def simulate_usage():
-                """模拟使用数据变化"""
+                """模拟使用数据变化，每10秒一次"""
                 import random
+                nonlocal flush_pending
+                
+                # 模拟新的API调用
+                cost_increase = random.uniform(0.01, 0.05)
+                token_increase = random.randint(50, 200)
+                stats.add_usage(token_increase, 0, cost_increase)
+                app.refresh_data()
+                
+                # 延迟保存：合并短时间内的多次更新，只写一次磁盘
+                if app.billing_monitor.config.auto_save and not flush_pending:
+                    flush_pending = True
+                    app.root.after(5000, flush_usage_stats)
                 
-                while True:
-                    time.sleep(10)  # 每10秒更新一次
-                    
-                    # 模拟新的API调用
-                    cost_increase = random.uniform(0.01, 0.05)
-                    token_increase = random.randint(50, 200)
-                    
-                    app.billing_monitor.config.usage_stats.daily_cost += cost_increase
-                    app.billing_monitor.config.usage_stats.monthly_cost += cost_increase
-                    app.billing_monitor.config.usage_stats.total_cost += cost_increase
-                    
-                    app.billing_monitor.config.usage_stats.daily_input_tokens += token_increase
-                    app.billing_monitor.config.usage_stats.monthly_input_tokens += token_increase
-                    app.billing_monitor.config.usage_stats.total_input_tokens += token_increase
-                    
-                    app.billing_monitor.config.usage_stats.request_count += 1
-                    app.billing_monitor.config.usage_stats.total_requests += 1
-                    app.billing_monitor.config.usage_stats.daily_requests += 1
-                    app.billing_monitor.config.usage_stats.monthly_requests += 1
-                    
-                    # 保存更新
-                    if app.billing_monitor.config.auto_save:
-                        app.billing_monitor.config_manager.save_config(app.billing_monitor.config)
+                app.root.after(10000, simulate_usage)
             
-            # 启动模拟线程
-            simulation_thread = threading.Thread(target=simulate_usage, daemon=True)
-            simulation_thread.start()
+            app.root.after(10000, simulate_usage)
             
             # 运行GUI
             app.run()
@@ -146,94 +204,27 @@ def create_demo_window():
         except Exception as e:
             messagebox.showerror("错误", f"启动统计窗口时出错: {e}")
     
+    # 演示按钮：(文本, 背景色, 回调)
+    buttons = [
+        ("🖥️ 完整GUI界面", "#4CAF50", start_gui),
+        ("📊 GUI + 实时数据模拟", "#2196F3", start_gui_with_simulation),
+        ("⚙️ 配置窗口", "#FF9800", show_config_only),
+        ("📈 统计窗口", "#9C27B0", show_stats_only),
+    ]
+    title_text = "OpenAI Billing Monitor"
+    subtitle_text = "选择要演示的GUI组件"
+    info_text = "注意：这些是演示界面，使用模拟数据\n实际使用时数据来自真实的API调用"
+    
     # 创建演示选择窗口
     demo_root = tk.Tk()
     demo_root.title("OpenAI Billing Monitor - GUI演示")
     demo_root.geometry("400x300")
     demo_root.resizable(False, False)
     
-    # 标题
-    title_label = tk.Label(
-        demo_root, 
-        text="OpenAI Billing Monitor", 
-        font=("Arial", 16, "bold"),
-        pady=20
-    )
-    title_label.pack()
-    
-    subtitle_label = tk.Label(
-        demo_root,
-        text="选择要演示的GUI组件",
-        font=("Arial", 10),
-        pady=10
-    )
-    subtitle_label.pack()
-    
-    # 按钮框架
-    button_frame = tk.Frame(demo_root)
-    button_frame.pack(expand=True, fill="both", padx=40, pady=20)
-    
-    # 主GUI按钮
-    main_gui_btn = tk.Button(
-        button_frame,
-        text="🖥️ 完整GUI界面",
-        font=("Arial", 11),
-        command=start_gui,
-        height=2,
-        bg="#4CAF50",
-        fg="white",
-        relief="raised"
-    )
-    main_gui_btn.pack(fill="x", pady=5)
-    
-    # 模拟数据GUI按钮
-    sim_gui_btn = tk.Button(
-        button_frame,
-        text="📊 GUI + 实时数据模拟",
-        font=("Arial", 11),
-        command=start_gui_with_simulation,
-        height=2,
-        bg="#2196F3",
-        fg="white",
-        relief="raised"
-    )
-    sim_gui_btn.pack(fill="x", pady=5)
-    
-    # 配置窗口按钮
-    config_btn = tk.Button(
-        button_frame,
-        text="⚙️ 配置窗口",
-        font=("Arial", 11),
-        command=show_config_only,
-        height=2,
-        bg="#FF9800",
-        fg="white",
-        relief="raised"
-    )
-    config_btn.pack(fill="x", pady=5)
-    
-    # 统计窗口按钮
-    stats_btn = tk.Button(
-        button_frame,
-        text="📈 统计窗口",
-        font=("Arial", 11),
-        command=show_stats_only,
-        height=2,
-        bg="#9C27B0",
-        fg="white",
-        relief="raised"
-    )
-    stats_btn.pack(fill="x", pady=5)
-    
-    # 说明文本
-    info_label = tk.Label(
-        demo_root,
-        text="注意：这些是演示界面，使用模拟数据\n实际使用时数据来自真实的API调用",
-        font=("Arial", 8),
-        fg="gray",
-        pady=10
-    )
-    info_label.pack(side="bottom")
+    if legacy_widgets:
+        _build_widget_launcher(demo_root, buttons, title_text, subtitle_text, info_text)
+    else:
+        _build_canvas_launcher(demo_root, buttons, title_text, subtitle_text, info_text)
     
     return demo_root
 
@@ -246,7 +237,7 @@ def main():
     
     try:
         # 创建并显示演示窗口
-        demo_window = create_demo_window()
+        demo_window = create_demo_window(legacy_widgets="--legacy-widgets" in sys.argv)
         demo_window.mainloop()
         
     except Exception as e:
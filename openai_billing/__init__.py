@@ -8,10 +8,14 @@ This library provides:
 - GUI for configuration and monitoring
 """
 
-from .core.billing_monitor import BillingMonitor
-from .core.wrapper import OpenAIWrapper
-from .models.billing_models import BillingConfig, ModelConfig, UsageStats
-from .core.decorators import monitor_openai_call
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core.billing_monitor import BillingMonitor
+    from .core.wrapper import OpenAIWrapper
+    from .models.billing_models import BillingConfig, ModelConfig, UsageStats
+    from .core.decorators import monitor_openai_call, get_global_monitor, set_global_monitor
 
 __version__ = "0.1.0"
 __all__ = [
@@ -21,4 +25,32 @@ __all__ = [
     "ModelConfig",
     "UsageStats",
     "monitor_openai_call",
+    "get_global_monitor",
+    "set_global_monitor",
 ]
+
+# Public names are imported on first access so that importing the package
+# doesn't pull in the OpenAI SDK (and its HTTP stack) until it's needed.
+_LAZY_IMPORTS = {
+    "BillingMonitor": ".core.billing_monitor",
+    "OpenAIWrapper": ".core.wrapper",
+    "BillingConfig": ".models.billing_models",
+    "ModelConfig": ".models.billing_models",
+    "UsageStats": ".models.billing_models",
+    "monitor_openai_call": ".core.decorators",
+    "get_global_monitor": ".core.decorators",
+    "set_global_monitor": ".core.decorators",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -3,176 +3,82 @@ Default model configurations for popular AI models.
 Prices are based on public pricing as of 2024.
 """
 
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 from ..models.billing_models import ModelConfig
 
 
-def get_default_model_configs() -> Dict[str, ModelConfig]:
-    """Get default model configurations for popular AI models."""
-    
-    configs = {
-        # OpenAI Models
-        "gpt-4": ModelConfig(
-            name="gpt-4",
-            input_token_price=0.03,
-            output_token_price=0.06,
-            max_tokens=8192
-        ),
-        "gpt-4-32k": ModelConfig(
-            name="gpt-4-32k",
-            input_token_price=0.06,
-            output_token_price=0.12,
-            max_tokens=32768
-        ),
-        "gpt-4-turbo": ModelConfig(
-            name="gpt-4-turbo",
-            input_token_price=0.01,
-            output_token_price=0.03,
-            max_tokens=128000
-        ),
-        "gpt-4o": ModelConfig(
-            name="gpt-4o",
-            input_token_price=0.005,
-            output_token_price=0.015,
-            max_tokens=128000
-        ),
-        "gpt-4o-mini": ModelConfig(
-            name="gpt-4o-mini",
-            input_token_price=0.00015,
-            output_token_price=0.0006,
-            max_tokens=128000
-        ),
-        "gpt-3.5-turbo": ModelConfig(
-            name="gpt-3.5-turbo",
-            input_token_price=0.0015,
-            output_token_price=0.002,
-            max_tokens=16385
-        ),
-        "gpt-3.5-turbo-16k": ModelConfig(
-            name="gpt-3.5-turbo-16k",
-            input_token_price=0.003,
-            output_token_price=0.004,
-            max_tokens=16385
-        ),
-        
-        # Qwen Models (Alibaba Cloud)
-        "qwen-turbo": ModelConfig(
-            name="qwen-turbo",
-            input_token_price=0.002,
-            output_token_price=0.006,
-            max_tokens=8192
-        ),
-        "qwen-plus": ModelConfig(
-            name="qwen-plus",
-            input_token_price=0.004,
-            output_token_price=0.012,
-            max_tokens=32768
-        ),
-        "qwen-max": ModelConfig(
-            name="qwen-max",
-            input_token_price=0.02,
-            output_token_price=0.06,
-            max_tokens=8192
-        ),
-        "qwen-max-longcontext": ModelConfig(
-            name="qwen-max-longcontext",
-            input_token_price=0.02,
-            output_token_price=0.06,
-            max_tokens=30000
-        ),
-        
-        # Claude Models (Anthropic)
-        "claude-3-opus": ModelConfig(
-            name="claude-3-opus",
-            input_token_price=0.015,
-            output_token_price=0.075,
-            max_tokens=200000
-        ),
-        "claude-3-sonnet": ModelConfig(
-            name="claude-3-sonnet",
-            input_token_price=0.003,
-            output_token_price=0.015,
-            max_tokens=200000
-        ),
-        "claude-3-haiku": ModelConfig(
-            name="claude-3-haiku",
-            input_token_price=0.00025,
-            output_token_price=0.00125,
-            max_tokens=200000
-        ),
-        
-        # Gemini Models (Google)
-        "gemini-pro": ModelConfig(
-            name="gemini-pro",
-            input_token_price=0.0005,
-            output_token_price=0.0015,
-            max_tokens=32768
-        ),
-        "gemini-pro-vision": ModelConfig(
-            name="gemini-pro-vision",
-            input_token_price=0.0005,
-            output_token_price=0.0015,
-            max_tokens=16384
-        ),
-        
-        # DeepSeek Models
-        "deepseek-chat": ModelConfig(
-            name="deepseek-chat",
-            input_token_price=0.00014,
-            output_token_price=0.00028,
-            max_tokens=32768
-        ),
-        "deepseek-coder": ModelConfig(
-            name="deepseek-coder",
-            input_token_price=0.00014,
-            output_token_price=0.00028,
-            max_tokens=16384
-        ),
-        
-        # Moonshot Models
-        "moonshot-v1-8k": ModelConfig(
-            name="moonshot-v1-8k",
-            input_token_price=0.001,
-            output_token_price=0.001,
-            max_tokens=8192
-        ),
-        "moonshot-v1-32k": ModelConfig(
-            name="moonshot-v1-32k",
-            input_token_price=0.002,
-            output_token_price=0.002,
-            max_tokens=32768
-        ),
-        "moonshot-v1-128k": ModelConfig(
-            name="moonshot-v1-128k",
-            input_token_price=0.008,
-            output_token_price=0.008,
-            max_tokens=131072
-        ),
-        
-        # Baichuan Models
-        "baichuan2-turbo": ModelConfig(
-            name="baichuan2-turbo",
-            input_token_price=0.008,
-            output_token_price=0.008,
-            max_tokens=32768
-        ),
-        "baichuan2-turbo-192k": ModelConfig(
-            name="baichuan2-turbo-192k",
-            input_token_price=0.016,
-            output_token_price=0.016,
-            max_tokens=196608
-        ),
-    }
-    
-    return configs
+# (name, input_token_price, output_token_price, cached_input_token_price, max_tokens)
+_MODEL_SPECS: Tuple[Tuple[str, float, float, Optional[float], int], ...] = (
+    # OpenAI Models
+    ("gpt-4", 0.03, 0.06, 0.015, 8192),
+    ("gpt-4-32k", 0.06, 0.12, 0.03, 32768),
+    ("gpt-4-turbo", 0.01, 0.03, 0.005, 128000),
+    ("gpt-4o", 0.005, 0.015, 0.0025, 128000),
+    ("gpt-4o-mini", 0.00015, 0.0006, 0.000075, 128000),
+    ("gpt-3.5-turbo", 0.0015, 0.002, 0.00075, 16385),
+    ("gpt-3.5-turbo-16k", 0.003, 0.004, 0.0015, 16385),
+
+    # Qwen Models (Alibaba Cloud)
+    ("qwen-turbo", 0.002, 0.006, None, 8192),
+    ("qwen-plus", 0.004, 0.012, None, 32768),
+    ("qwen-max", 0.02, 0.06, None, 8192),
+    ("qwen-max-longcontext", 0.02, 0.06, None, 30000),
+
+    # Claude Models (Anthropic)
+    ("claude-3-opus", 0.015, 0.075, 0.0015, 200000),
+    ("claude-3-sonnet", 0.003, 0.015, 0.0003, 200000),
+    ("claude-3-haiku", 0.00025, 0.00125, 0.000025, 200000),
+
+    # Gemini Models (Google)
+    ("gemini-pro", 0.0005, 0.0015, None, 32768),
+    ("gemini-pro-vision", 0.0005, 0.0015, None, 16384),
+
+    # DeepSeek Models
+    ("deepseek-chat", 0.00014, 0.00028, None, 32768),
+    ("deepseek-coder", 0.00014, 0.00028, None, 16384),
+
+    # Moonshot Models
+    ("moonshot-v1-8k", 0.001, 0.001, None, 8192),
+    ("moonshot-v1-32k", 0.002, 0.002, None, 32768),
+    ("moonshot-v1-128k", 0.008, 0.008, None, 131072),
+
+    # Baichuan Models
+    ("baichuan2-turbo", 0.008, 0.008, None, 32768),
+    ("baichuan2-turbo-192k", 0.016, 0.016, None, 196608),
+)
+
+# Built once at import; ModelConfig is frozen, so the instances can be shared
+_DEFAULT_MODELS: Dict[str, ModelConfig] = {
+    name: ModelConfig(
+        name=name,
+        input_token_price=input_price,
+        output_token_price=output_price,
+        cached_input_token_price=cached_price,
+        max_tokens=max_tokens
+    )
+    for name, input_price, output_price, cached_price, max_tokens in _MODEL_SPECS
+}
+
+_DEFAULT_MODELS_VIEW: Mapping[str, ModelConfig] = MappingProxyType(_DEFAULT_MODELS)
+_DEFAULT_MODEL_NAMES: Tuple[str, ...] = tuple(_DEFAULT_MODELS)
+
+
+def get_default_model_configs() -> Mapping[str, ModelConfig]:
+    """
+    Get default model configurations for popular AI models.
+
+    The configurations are shared, so the returned mapping is read-only.
+    Use ``dict(get_default_model_configs())`` for a mutable copy.
+    """
+    return _DEFAULT_MODELS_VIEW
 
 
 def get_model_config_by_name(model_name: str) -> Optional[ModelConfig]:
     """Get a specific model configuration by name."""
-    configs = get_default_model_configs()
-    return configs.get(model_name)
+    return _DEFAULT_MODELS.get(model_name)
 
 
 def get_available_models() -> List[str]:
-    """Get list of available model names."""
-    return list(get_default_model_configs().keys())
+    """Get the names of the available default models."""
+    return list(_DEFAULT_MODEL_NAMES)
@@ -4,20 +4,60 @@ Configuration manager for loading, saving, and managing billing configurations.
 
 import os
 import json
-import yaml
+import time
+import atexit
+import threading
+import weakref
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, ContextManager
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from pydantic import TypeAdapter
+
 from ..models.billing_models import BillingConfig, ModelConfig, UsageStats, ThresholdConfig
 from .default_configs import get_default_model_configs
 
+# Validates all custom model entries of a config file in a single call
+_MODELS_ADAPTER = TypeAdapter(Dict[str, ModelConfig])
+
+# Managers with usage stats writes pending; weak, so managers can still be collected
+_PENDING_STATS_MANAGERS: "weakref.WeakSet[ConfigManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_pending_usage_stats() -> None:
+    """Write the usage stats still pending in any config manager at interpreter exit."""
+    for config_manager in list(_PENDING_STATS_MANAGERS):
+        config_manager.flush_usage_stats()
+
+
+def _load_yaml(stream) -> Any:
+    """Parse YAML, preferring the libyaml C loader."""
+    # Imported lazily: processes served by the JSON config cache never need yaml
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
+
+
+def _dump_yaml(data: Any) -> str:
+    """Serialize data to a YAML string, preferring the libyaml C dumper."""
+    import yaml
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    # Without a stream, yaml.dump emits into an in-memory buffer and returns its contents
+    return yaml.dump(data, Dumper=dumper, default_flow_style=False, allow_unicode=True)
+
 
 class ConfigManager:
     """Manager for billing configuration files."""
     
     DEFAULT_CONFIG_FILE = "openai_billing_config.yaml"
     DEFAULT_STATS_FILE = "openai_billing_stats.json"
+    DEFAULT_CACHE_FILE = "openai_billing_cache.db"
     
     def __init__(self, config_dir: Optional[str] = None):
         """
@@ -34,9 +74,20 @@ class ConfigManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.config_file = self.config_dir / self.DEFAULT_CONFIG_FILE
+        self.config_cache_file = self.config_file.with_suffix(".cache.json")
         self.stats_file = self.config_dir / self.DEFAULT_STATS_FILE
+        self.cache_file = self.config_dir / self.DEFAULT_CACHE_FILE
         
         self._billing_config: Optional[BillingConfig] = None
+        
+        # Debounced usage stats writes (see schedule_usage_stats_save)
+        self.stats_flush_interval = 5.0
+        self._stats_lock = threading.Lock()
+        self._stats_write_lock = threading.Lock()
+        self._pending_stats: Optional[UsageStats] = None
+        self._pending_stats_lock: Optional[ContextManager] = None
+        self._stats_flush_timer: Optional[threading.Timer] = None
+        self._last_stats_flush = 0.0
     
     def load_config(self) -> BillingConfig:
         """Load billing configuration from file or create default."""
@@ -44,24 +95,26 @@ class ConfigManager:
             return self._billing_config
         
         # Try to load existing configuration
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f)
-                
-                # Parse the configuration
-                billing_config = self._parse_config_data(config_data)
-                
-                # Load usage stats separately
-                usage_stats = self.load_usage_stats()
-                billing_config.usage_stats = usage_stats
-                
-                self._billing_config = billing_config
-                return billing_config
+        try:
+            config_data = self._read_config_data()
+            
+            # Parse the configuration
+            billing_config = self._parse_config_data(config_data)
             
-            except Exception as e:
-                print(f"Error loading configuration: {e}")
-                print("Using default configuration.")
+            # Load usage stats separately
+            usage_stats = self.load_usage_stats()
+            billing_config.usage_stats = usage_stats
+            
+            self._billing_config = billing_config
+            return billing_config
+        
+        except FileNotFoundError:
+            # First run: fall through to the default configuration
+            pass
+        
+        except Exception as e:
+            print(f"Error loading configuration: {e}")
+            print("Using default configuration.")
         
         # Create default configuration
         billing_config = self._create_default_config()
@@ -70,35 +123,45 @@ class ConfigManager:
         
         return billing_config
     
+    def peek_enabled(self) -> bool:
+        """
+        Check whether billing is enabled without loading the whole configuration.
+        
+        Only the top-level ``enabled:`` line of the config file is parsed, so the
+        model table is never validated. Falls back to load_config() when the file
+        is missing or the line cannot be found.
+        """
+        if self._billing_config is not None:
+            return self._billing_config.enabled
+        
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                enabled_line = next((line for line in f if line.startswith("enabled:")), None)
+        except OSError:
+            enabled_line = None
+        
+        if enabled_line is not None:
+            import yaml
+            try:
+                value = _load_yaml(enabled_line)["enabled"]
+            except yaml.YAMLError:
+                value = None
+            if isinstance(value, bool):
+                return value
+        
+        return self.load_config().enabled
+    
     def save_config(self, billing_config: BillingConfig) -> None:
         """Save billing configuration to file."""
         try:
             # Prepare config data for saving (exclude usage stats)
-            config_data = {
-                "enabled": billing_config.enabled,
-                "auto_save": billing_config.auto_save,
-                "thresholds": {
-                    "daily_cost_limit": billing_config.thresholds.daily_cost_limit,
-                    "monthly_cost_limit": billing_config.thresholds.monthly_cost_limit,
-                    "daily_token_limit": billing_config.thresholds.daily_token_limit,
-                    "monthly_token_limit": billing_config.thresholds.monthly_token_limit,
-                    "warning_threshold": billing_config.thresholds.warning_threshold,
-                },
-                "models": {}
-            }
+            config_data = self._config_to_dict(billing_config)
             
-            # Add model configurations
-            for name, model_config in billing_config.models.items():
-                config_data["models"][name] = {
-                    "name": model_config.name,
-                    "input_token_price": model_config.input_token_price,
-                    "output_token_price": model_config.output_token_price,
-                    "max_tokens": model_config.max_tokens,
-                }
-            
-            # Save configuration
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, allow_unicode=True)
+            # Save configuration with a single write to a temporary file, then swap it in
+            temp_file = self.config_file.with_suffix(self.config_file.suffix + ".part")
+            temp_file.write_text(_dump_yaml(config_data), encoding='utf-8')
+            os.replace(temp_file, self.config_file)
+            self._write_config_cache(config_data, self.config_file.stat())
             
             # Save usage stats separately
             self.save_usage_stats(billing_config.usage_stats)
@@ -109,14 +172,64 @@ class ConfigManager:
         except Exception as e:
             print(f"Error saving configuration: {e}")
     
+    def _read_config_data(self) -> Dict[str, Any]:
+        """
+        Read the raw configuration data.
+        
+        The JSON cache is used when it was written for the YAML file's current
+        modification time and size; otherwise the YAML file is parsed and the
+        cache is refreshed.
+        
+        Raises:
+            FileNotFoundError: If the YAML configuration file does not exist
+        """
+        config_stat = self.config_file.stat()
+        try:
+            cache_bytes = self.config_cache_file.read_bytes()
+            cache = orjson.loads(cache_bytes) if orjson is not None else json.loads(cache_bytes)
+            if cache["source"] == [config_stat.st_mtime_ns, config_stat.st_size]:
+                return cache["config"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            config_data = _load_yaml(f)
+        
+        if isinstance(config_data, dict):
+            self._write_config_cache(config_data, config_stat)
+        
+        return config_data
+    
+    def _write_config_cache(self, config_data: Dict[str, Any], config_stat: os.stat_result) -> None:
+        """
+        Write the JSON cache of the configuration file.
+        
+        Args:
+            config_data: Parsed configuration data
+            config_stat: Stat of the YAML file the data was read from or written to
+        """
+        try:
+            cache = {"source": [config_stat.st_mtime_ns, config_stat.st_size], "config": config_data}
+            temp_file = self.config_cache_file.with_suffix(self.config_cache_file.suffix + ".part")
+            if orjson is not None:
+                temp_file.write_bytes(orjson.dumps(cache))
+            else:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_file, self.config_cache_file)
+        
+        except Exception as e:
+            print(f"Error saving configuration cache: {e}")
+    
     def load_usage_stats(self) -> UsageStats:
         """Load usage statistics from file."""
-        if not self.stats_file.exists():
+        try:
+            stats_bytes = self.stats_file.read_bytes()
+        except FileNotFoundError:
             return UsageStats()
         
         try:
-            with open(self.stats_file, 'r', encoding='utf-8') as f:
-                stats_data = json.load(f)
+            stats_data = orjson.loads(stats_bytes) if orjson is not None else json.loads(stats_bytes)
             
             # Parse datetime fields
             for date_field in ['last_reset_date', 'last_daily_reset', 'last_monthly_reset']:
@@ -129,23 +242,83 @@ class ConfigManager:
             print(f"Error loading usage stats: {e}")
             return UsageStats()
     
-    def save_usage_stats(self, usage_stats: UsageStats) -> None:
-        """Save usage statistics to file."""
+    def save_usage_stats(self, usage_stats: UsageStats, lock: Optional[ContextManager] = None) -> None:
+        """
+        Save usage statistics to file.
+        
+        Args:
+            usage_stats: Usage statistics to save
+            lock: Lock guarding concurrent updates of usage_stats. The snapshot is
+                  taken while holding it; the file is written after releasing it.
+        """
         try:
-            # Convert to dictionary and handle datetime serialization
-            stats_data = usage_stats.model_dump()
+            if lock is not None:
+                with lock:
+                    stats_data = usage_stats.model_dump(mode="json")
+            else:
+                stats_data = usage_stats.model_dump(mode="json")
             
-            # Convert datetime objects to ISO format strings
-            for date_field in ['last_reset_date', 'last_daily_reset', 'last_monthly_reset']:
-                if date_field in stats_data and stats_data[date_field]:
-                    stats_data[date_field] = stats_data[date_field].isoformat()
-            
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats_data, f, indent=2, ensure_ascii=False)
+            # Write to a temporary file and swap it in so readers never see a partial file
+            temp_file = self.stats_file.with_suffix(self.stats_file.suffix + ".part")
+            with self._stats_write_lock:
+                if orjson is not None:
+                    temp_file.write_bytes(orjson.dumps(stats_data))
+                else:
+                    with open(temp_file, 'w', encoding='utf-8') as f:
+                        json.dump(stats_data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(temp_file, self.stats_file)
+                self._last_stats_flush = time.monotonic()
         
         except Exception as e:
             print(f"Error saving usage stats: {e}")
     
+    def schedule_usage_stats_save(self, usage_stats: UsageStats,
+                                  lock: Optional[ContextManager] = None) -> None:
+        """
+        Save usage statistics, coalescing frequent updates.
+        
+        The first update after a quiet period is written immediately. Further
+        updates within ``stats_flush_interval`` seconds are written together
+        once the interval has elapsed, or at interpreter exit.
+        
+        Args:
+            usage_stats: Usage statistics to save
+            lock: Lock guarding concurrent updates of usage_stats; the write may
+                  happen on a timer thread, so the snapshot is taken under it.
+                  Must not be held by the caller.
+        """
+        with self._stats_lock:
+            self._pending_stats = usage_stats
+            self._pending_stats_lock = lock
+            if self._stats_flush_timer is not None:
+                return
+            
+            delay = self._last_stats_flush + self.stats_flush_interval - time.monotonic()
+            if delay > 0:
+                self._stats_flush_timer = threading.Timer(delay, self.flush_usage_stats)
+                self._stats_flush_timer.daemon = True
+                self._stats_flush_timer.start()
+                _PENDING_STATS_MANAGERS.add(self)
+                return
+        
+        self.flush_usage_stats()
+    
+    def flush_usage_stats(self) -> None:
+        """Write usage statistics still pending from schedule_usage_stats_save()."""
+        with self._stats_lock:
+            usage_stats = self._pending_stats
+            lock = self._pending_stats_lock
+            timer = self._stats_flush_timer
+            self._pending_stats = None
+            self._pending_stats_lock = None
+            self._stats_flush_timer = None
+            _PENDING_STATS_MANAGERS.discard(self)
+        
+        if timer is not None:
+            timer.cancel()
+        if usage_stats is not None:
+            self.save_usage_stats(usage_stats, lock)
+    
     def reset_usage_stats(self, reset_type: str = "all") -> None:
         """
         Reset usage statistics.
@@ -186,7 +359,7 @@ class ConfigManager:
     def _create_default_config(self) -> BillingConfig:
         """Create a default billing configuration."""
         # Load default model configurations
-        default_models = get_default_model_configs()
+        default_models = dict(get_default_model_configs())
         
         # Create default threshold configuration
         default_thresholds = ThresholdConfig(
@@ -213,19 +386,34 @@ class ConfigManager:
         """Parse configuration data from file."""
         # Parse threshold configuration
         thresholds_data = config_data.get("thresholds", {})
-        thresholds = ThresholdConfig(**thresholds_data)
+        thresholds = ThresholdConfig.model_validate(thresholds_data)
         
         # Parse model configurations
-        models = {}
         models_data = config_data.get("models", {})
         
         # Add default models first
         default_models = get_default_model_configs()
-        models.update(default_models)
+        models = dict(default_models)
         
-        # Override with custom configurations
+        # Override with custom configurations. Saved files repeat every default
+        # model, so entries identical to a default reuse it instead of re-validating.
+        model_fields = ModelConfig.model_fields
+        custom_models_data = {}
         for name, model_data in models_data.items():
-            models[name] = ModelConfig(**model_data)
+            default = default_models.get(name)
+            if default is not None and "cached_input_token_price" not in model_data:
+                # Files written before cached pricing existed: inherit the default's price
+                model_data = {**model_data, "cached_input_token_price": default.cached_input_token_price}
+            if (
+                default is not None
+                and len(model_data) == len(model_fields)
+                and all(getattr(default, key, None) == value for key, value in model_data.items())
+            ):
+                continue
+            custom_models_data[name] = model_data
+        
+        if custom_models_data:
+            models.update(_MODELS_ADAPTER.validate_python(custom_models_data))
         
         # Create billing configuration
         billing_config = BillingConfig(
@@ -234,6 +422,9 @@ class ConfigManager:
             usage_stats=UsageStats(),  # Will be loaded separately
             enabled=config_data.get("enabled", True),
             auto_save=config_data.get("auto_save", True),
+            cache_enabled=config_data.get("cache_enabled", False),
+            cache_ttl_seconds=config_data.get("cache_ttl_seconds", 6 * 60 * 60),
+            skip_confirmations=config_data.get("skip_confirmations", False),
             config_file_path=str(self.config_file)
         )
         
@@ -246,41 +437,15 @@ class ConfigManager:
         export_file = Path(export_path)
         if export_file.suffix.lower() == '.json':
             # Export as JSON
-            config_dict = config.model_dump()
-            # Handle datetime serialization
-            for date_field in ['last_reset_date', 'last_daily_reset', 'last_monthly_reset']:
-                if hasattr(config_dict['usage_stats'], date_field):
-                    date_val = config_dict['usage_stats'][date_field]
-                    if date_val:
-                        config_dict['usage_stats'][date_field] = date_val.isoformat()
+            config_dict = config.model_dump(mode="json")
             
             with open(export_file, 'w', encoding='utf-8') as f:
                 json.dump(config_dict, f, indent=2, ensure_ascii=False)
         else:
             # Export as YAML (default)
-            config_data = self._prepare_config_for_export(config)
-            with open(export_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, allow_unicode=True)
+            config_data = self._config_to_dict(config)
+            export_file.write_text(_dump_yaml(config_data), encoding='utf-8')
     
-    def _prepare_config_for_export(self, config: BillingConfig) -> Dict[str, Any]:
-        """Prepare configuration data for export."""
-        return {
-            "enabled": config.enabled,
-            "auto_save": config.auto_save,
-            "thresholds": {
-                "daily_cost_limit": config.thresholds.daily_cost_limit,
-                "monthly_cost_limit": config.thresholds.monthly_cost_limit,
-                "daily_token_limit": config.thresholds.daily_token_limit,
-                "monthly_token_limit": config.thresholds.monthly_token_limit,
-                "warning_threshold": config.thresholds.warning_threshold,
-            },
-            "models": {
-                name: {
-                    "name": model.name,
-                    "input_token_price": model.input_token_price,
-                    "output_token_price": model.output_token_price,
-                    "max_tokens": model.max_tokens,
-                }
-                for name, model in config.models.items()
-            }
-        }
+    def _config_to_dict(self, config: BillingConfig) -> Dict[str, Any]:
+        """Convert a configuration to the plain data written to config files (without usage stats)."""
+        return config.model_dump(mode="json", exclude={"usage_stats", "config_file_path"})
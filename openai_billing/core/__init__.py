@@ -1,16 +1,32 @@
 """Core billing functionality."""
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .billing_monitor import BillingMonitor
-from .wrapper import OpenAIWrapper
 from .decorators import monitor_openai_call
 from .token_counter import TokenCounter
+from .cache import ResponseCache
 from .exceptions import BillingException, ThresholdExceededException
 
+if TYPE_CHECKING:
+    from .wrapper import OpenAIWrapper
+
 __all__ = [
     "BillingMonitor", 
     "OpenAIWrapper", 
     "monitor_openai_call",
     "TokenCounter",
+    "ResponseCache",
     "BillingException", 
     "ThresholdExceededException"
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # The wrapper imports the OpenAI SDK, so only load it when it's used
+    if name == "OpenAIWrapper":
+        value = importlib.import_module(".wrapper", __name__).OpenAIWrapper
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,12 +3,13 @@ Core billing monitor that tracks usage and enforces limits.
 """
 
 import logging
+import threading
 import warnings
-from typing import Optional, Dict, Any, Callable
-from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from datetime import datetime, timedelta
 
 from ..config.manager import ConfigManager
-from ..models.billing_models import BillingConfig
+from ..models.billing_models import BillingConfig, ThresholdConfig, UsageStats
 from .token_counter import TokenCounter
 from .exceptions import (
     BillingException, 
@@ -36,6 +37,21 @@ class BillingMonitor:
         self.on_threshold_exceeded: Optional[Callable[[str, Dict[str, Any]], None]] = None
         self.on_usage_update: Optional[Callable[[Dict[str, Any]], None]] = None
         
+        # Cached get_usage_summary() result and the state it was computed from
+        self._summary_cache: Optional[Dict[str, Any]] = None
+        self._summary_source: Optional[Tuple[Any, int, Any]] = None
+        
+        # Threshold limits as plain values, and the (frozen) ThresholdConfig they came from
+        self._limits: Tuple[Optional[float], Optional[float], Optional[int], Optional[int]] = (None, None, None, None)
+        self._limits_source: Optional[ThresholdConfig] = None
+        
+        # Guards the usage counters against concurrent track_usage() calls
+        self._lock = threading.Lock()
+        
+        # Daily/monthly resets can only fall due at midnight; skip the checks until then
+        self._next_reset_check = datetime.min
+        self._reset_checked_stats: Optional[UsageStats] = None
+        
         # Load configuration
         self._config = self.config_manager.load_config()
     
@@ -53,7 +69,8 @@ class BillingMonitor:
         return self._config.enabled
     
     def track_usage(self, model_name: str, input_tokens: int, output_tokens: int,
-                   request_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                   request_data: Optional[Dict[str, Any]] = None,
+                   cached_input_tokens: int = 0) -> Dict[str, Any]:
         """
         Track token usage for a specific model.
         
@@ -62,6 +79,7 @@ class BillingMonitor:
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
             request_data: Optional request data for logging
+            cached_input_tokens: Number of input tokens served from the prompt cache
             
         Returns:
             Dictionary with usage information and warnings
@@ -81,35 +99,43 @@ class BillingMonitor:
                 # If no models are configured, log warning and continue
                 self.logger.warning(f"Model '{model_name}' not configured, using default pricing")
         
-        # Check for daily/monthly resets
-        self._config.check_daily_reset()
-        self._config.check_monthly_reset()
-        
-        # Calculate cost and update usage
-        cost = self._config.update_usage(model_name, input_tokens, output_tokens)
-        
-        # Check thresholds
-        threshold_warnings = self._config.check_thresholds()
-        
-        # Prepare usage info
-        usage_info = {
-            "model_name": model_name,
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "cost": cost,
-            "total_cost": self._config.usage_stats.total_cost,
-            "daily_cost": self._config.usage_stats.daily_cost,
-            "monthly_cost": self._config.usage_stats.monthly_cost,
-            "warnings": threshold_warnings,
-            "timestamp": datetime.now().isoformat()
-        }
+        # Counter updates and the usage snapshot are atomic; saving and callbacks run outside the lock
+        with self._lock:
+            # Check for daily/monthly resets (one clock read serves both checks and the timestamp)
+            now = datetime.now()
+            stats = self._config.usage_stats
+            if now >= self._next_reset_check or stats is not self._reset_checked_stats:
+                self._config.check_daily_reset(now)
+                self._config.check_monthly_reset(now)
+                self._next_reset_check = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+                self._reset_checked_stats = stats
+            
+            # Calculate cost and update usage
+            cost = self._config.update_usage(model_name, input_tokens, output_tokens, cached_input_tokens)
+            
+            # Check thresholds
+            threshold_warnings = self._config.check_thresholds()
+            
+            # Prepare usage info
+            usage_info = {
+                "model_name": model_name,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cached_input_tokens": cached_input_tokens,
+                "cost": cost,
+                "total_cost": stats.total_cost,
+                "daily_cost": stats.daily_cost,
+                "monthly_cost": stats.monthly_cost,
+                "warnings": threshold_warnings,
+                "timestamp": now.isoformat()
+            }
         
         # Handle threshold warnings and limits
         self._handle_threshold_warnings(threshold_warnings, usage_info)
         
-        # Save configuration if auto_save is enabled
+        # Save usage stats if auto_save is enabled (only the stats changed)
         if self._config.auto_save:
-            self.config_manager.save_config(self._config)
+            self.config_manager.schedule_usage_stats_save(self._config.usage_stats, self._lock)
         
         # Call usage update callback
         if self.on_usage_update:
@@ -134,18 +160,29 @@ class BillingMonitor:
             Dictionary with usage information
         """
         try:
-            # Extract token usage from response
-            input_tokens, output_tokens = self.token_counter.estimate_tokens_from_response(
-                response_data, model_name
-            )
+            usage = response_data.get("usage")
+            if usage and "prompt_tokens" in usage:
+                # Fast path: the API reported its own token counts
+                input_tokens = usage["prompt_tokens"]
+                output_tokens = usage.get("completion_tokens") or 0
+                details = usage.get("prompt_tokens_details") or {}
+                cached_input_tokens = details.get("cached_tokens") or 0
+            else:
+                # Extract token usage from response content
+                input_tokens, output_tokens = self.token_counter.estimate_tokens_from_response(
+                    response_data, model_name
+                )
+                cached_input_tokens = self.token_counter.get_cached_tokens_from_response(response_data)
             
-            return self.track_usage(model_name, input_tokens, output_tokens, request_data)
+            return self.track_usage(model_name, input_tokens, output_tokens, request_data,
+                                    cached_input_tokens)
             
         except Exception as e:
             self.logger.error(f"Error tracking OpenAI response: {e}")
             return {"error": str(e)}
     
-    def estimate_cost(self, model_name: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    def estimate_cost(self, model_name: str, input_tokens: int, output_tokens: int,
+                      cached_input_tokens: int = 0) -> Optional[float]:
         """
         Estimate cost for given token usage without tracking it.
         
@@ -153,11 +190,24 @@ class BillingMonitor:
             model_name: Name of the model
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
+            cached_input_tokens: Number of input tokens expected to hit the prompt cache
             
         Returns:
             Estimated cost in USD, or None if model not configured
         """
-        return self._config.calculate_cost(model_name, input_tokens, output_tokens)
+        return self._config.calculate_cost(model_name, input_tokens, output_tokens, cached_input_tokens)
+    
+    def estimate_cost_batch(self, usages: List[Tuple[Any, ...]]) -> List[float]:
+        """
+        Estimate costs for many usages without tracking them.
+        
+        Args:
+            usages: ``(model_name, input_tokens, output_tokens[, cached_input_tokens])`` tuples
+            
+        Returns:
+            Estimated cost in USD for each usage (0.0 for unconfigured models)
+        """
+        return self._config.calculate_costs(usages)
     
     def check_limits_before_request(self, model_name: str, estimated_tokens: int) -> Dict[str, Any]:
         """
@@ -179,77 +229,116 @@ class BillingMonitor:
             estimated_cost = 0.0
         
         current_stats = self._config.usage_stats
-        thresholds = self._config.thresholds
+        daily_cost_limit, monthly_cost_limit, daily_token_limit, monthly_token_limit = self._threshold_limits()
+        daily_cost = current_stats.daily_cost
+        monthly_cost = current_stats.monthly_cost
         
         result = {
             "allowed": True,
             "warnings": [],
             "estimated_cost": estimated_cost,
-            "current_daily_cost": current_stats.daily_cost,
-            "current_monthly_cost": current_stats.monthly_cost,
+            "current_daily_cost": daily_cost,
+            "current_monthly_cost": monthly_cost,
         }
         
         # Check daily cost limit
-        if thresholds.daily_cost_limit:
-            projected_daily_cost = current_stats.daily_cost + estimated_cost
-            if projected_daily_cost > thresholds.daily_cost_limit:
+        if daily_cost_limit:
+            projected_daily_cost = daily_cost + estimated_cost
+            if projected_daily_cost > daily_cost_limit:
                 result["allowed"] = False
                 result["warnings"].append({
                     "type": "daily_cost_limit",
                     "message": f"Request would exceed daily cost limit",
-                    "current": current_stats.daily_cost,
+                    "current": daily_cost,
                     "projected": projected_daily_cost,
-                    "limit": thresholds.daily_cost_limit
+                    "limit": daily_cost_limit
                 })
         
         # Check monthly cost limit
-        if thresholds.monthly_cost_limit:
-            projected_monthly_cost = current_stats.monthly_cost + estimated_cost
-            if projected_monthly_cost > thresholds.monthly_cost_limit:
+        if monthly_cost_limit:
+            projected_monthly_cost = monthly_cost + estimated_cost
+            if projected_monthly_cost > monthly_cost_limit:
                 result["allowed"] = False
                 result["warnings"].append({
                     "type": "monthly_cost_limit", 
                     "message": f"Request would exceed monthly cost limit",
-                    "current": current_stats.monthly_cost,
+                    "current": monthly_cost,
                     "projected": projected_monthly_cost,
-                    "limit": thresholds.monthly_cost_limit
+                    "limit": monthly_cost_limit
                 })
         
         # Check daily token limit
-        if thresholds.daily_token_limit:
+        if daily_token_limit:
             current_daily_tokens = current_stats.daily_input_tokens + current_stats.daily_output_tokens
             projected_daily_tokens = current_daily_tokens + estimated_tokens
-            if projected_daily_tokens > thresholds.daily_token_limit:
+            if projected_daily_tokens > daily_token_limit:
                 result["allowed"] = False
                 result["warnings"].append({
                     "type": "daily_token_limit",
                     "message": f"Request would exceed daily token limit",
                     "current": current_daily_tokens,
                     "projected": projected_daily_tokens,
-                    "limit": thresholds.daily_token_limit
+                    "limit": daily_token_limit
                 })
         
         # Check monthly token limit
-        if thresholds.monthly_token_limit:
+        if monthly_token_limit:
             current_monthly_tokens = current_stats.monthly_input_tokens + current_stats.monthly_output_tokens
             projected_monthly_tokens = current_monthly_tokens + estimated_tokens
-            if projected_monthly_tokens > thresholds.monthly_token_limit:
+            if projected_monthly_tokens > monthly_token_limit:
                 result["allowed"] = False
                 result["warnings"].append({
                     "type": "monthly_token_limit",
                     "message": f"Request would exceed monthly token limit",
                     "current": current_monthly_tokens,
                     "projected": projected_monthly_tokens,
-                    "limit": thresholds.monthly_token_limit
+                    "limit": monthly_token_limit
                 })
         
         return result
     
+    def has_any_limit(self) -> bool:
+        """Check whether any daily or monthly cost/token limit is configured."""
+        return any(self._threshold_limits())
+    
+    def _threshold_limits(self) -> Tuple[Optional[float], Optional[float], Optional[int], Optional[int]]:
+        """
+        Get the daily/monthly cost and token limits as plain values.
+        
+        ThresholdConfig is frozen, so the values are only re-read when the
+        thresholds object itself is replaced.
+        """
+        thresholds = self._config.thresholds
+        if thresholds is not self._limits_source:
+            self._limits = (
+                thresholds.daily_cost_limit,
+                thresholds.monthly_cost_limit,
+                thresholds.daily_token_limit,
+                thresholds.monthly_token_limit,
+            )
+            self._limits_source = thresholds
+        return self._limits
+    
     def get_usage_summary(self) -> Dict[str, Any]:
-        """Get a summary of current usage statistics."""
+        """
+        Get a summary of current usage statistics.
+        
+        The summary is recomputed only when the usage stats or thresholds have
+        changed since the last call; callers always get their own copy.
+        """
         stats = self._config.usage_stats
         thresholds = self._config.thresholds
         
+        source = self._summary_source
+        if (self._summary_cache is None or source[0] is not stats
+                or source[1] != stats.version or source[2] is not thresholds):
+            self._summary_cache = self._compute_usage_summary(stats, thresholds)
+            self._summary_source = (stats, stats.version, thresholds)
+        
+        return dict(self._summary_cache)
+    
+    def _compute_usage_summary(self, stats: UsageStats, thresholds: ThresholdConfig) -> Dict[str, Any]:
+        """Build the usage summary dictionary."""
         summary = {
             "total_requests": stats.total_requests,
             "daily_requests": stats.daily_requests,
@@ -263,6 +352,9 @@ class BillingMonitor:
             "daily_output_tokens": stats.daily_output_tokens,
             "monthly_input_tokens": stats.monthly_input_tokens,
             "monthly_output_tokens": stats.monthly_output_tokens,
+            "total_cached_input_tokens": stats.total_cached_input_tokens,
+            "daily_cached_input_tokens": stats.daily_cached_input_tokens,
+            "monthly_cached_input_tokens": stats.monthly_cached_input_tokens,
             "last_reset_date": stats.last_reset_date.isoformat(),
             "last_daily_reset": stats.last_daily_reset.isoformat(),
             "last_monthly_reset": stats.last_monthly_reset.isoformat(),
@@ -299,25 +391,34 @@ class BillingMonitor:
         self.config_manager.reset_usage_stats(reset_type)
         self.refresh_config()
     
-    def _handle_threshold_warnings(self, warnings: Dict[str, Any], usage_info: Dict[str, Any]) -> None:
+    def flush(self) -> None:
+        """
+        Write usage statistics whose auto-save is still pending.
+        
+        With auto_save enabled, track_usage() coalesces bursts of updates into
+        one write per ``config_manager.stats_flush_interval``; pending updates
+        are also written at interpreter exit.
+        """
+        self.config_manager.flush_usage_stats()
+    
+    def _handle_threshold_warnings(self, threshold_warnings: Dict[str, Any], usage_info: Dict[str, Any]) -> None:
         """Handle threshold warnings and exceeded limits."""
+        # Nothing to do for the common case of usage well below every limit
+        if not threshold_warnings:
+            return
         
         # Check for hard limits (throw exceptions)
-        exceeded_types = []
-        for warning_type in warnings:
-            if warning_type.endswith("_exceeded"):
-                exceeded_types.append(warning_type)
+        exceeded_type = next((w for w in threshold_warnings if w.endswith("_exceeded")), None)
         
-        if exceeded_types:
+        if exceeded_type:
             # Call threshold exceeded callback
             if self.on_threshold_exceeded:
                 try:
-                    self.on_threshold_exceeded(exceeded_types[0], usage_info)
+                    self.on_threshold_exceeded(exceeded_type, usage_info)
                 except Exception as e:
                     self.logger.error(f"Error in threshold exceeded callback: {e}")
             
             # Raise exception for the first exceeded threshold
-            exceeded_type = exceeded_types[0]
             if exceeded_type == "daily_cost_exceeded":
                 raise ThresholdExceededException(
                     f"Daily cost limit exceeded: ${usage_info['daily_cost']:.4f} >= ${self._config.thresholds.daily_cost_limit}",
@@ -350,7 +451,7 @@ class BillingMonitor:
                 )
         
         # Handle warning thresholds
-        warning_types = [w for w in warnings if w.endswith("_warning")]
+        warning_types = [w for w in threshold_warnings if w.endswith("_warning")]
         if warning_types:
             # Call warning callback
             if self.on_threshold_warning:
@@ -0,0 +1,122 @@
+"""
+On-disk cache for identical OpenAI API requests.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+class ResponseCache:
+    """
+    Content-addressed response cache backed by a SQLite database.
+
+    Requests are keyed on their JSON-serialized keyword arguments, so two calls
+    with the same model, messages and sampling parameters share one entry.
+    Cache hits never reach the API and are therefore not billed.
+    """
+
+    def __init__(self, db_path: Union[str, Path], ttl_seconds: Optional[float] = 6 * 60 * 60):
+        """
+        Initialize the response cache.
+
+        Args:
+            db_path: Path of the SQLite database file.
+            ttl_seconds: Lifetime of cached entries. None keeps entries forever.
+        """
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key BLOB PRIMARY KEY, created_at REAL NOT NULL, response TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(request_kwargs: Dict[str, Any], scope: str = "") -> bytes:
+        """
+        Build the cache key (a 16-byte blake2b digest) for a request.
+        
+        Args:
+            request_kwargs: Keyword arguments of the request
+            scope: Identifies who the request is sent to (endpoint and credentials),
+                   so identical requests to different accounts don't share entries
+        """
+        payload = json.dumps(request_kwargs, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(f"{scope}\0{payload}".encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            The cached response data, or None on a miss or expired entry
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT created_at, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                created_at, response = row
+                if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+
+            return json.loads(response)
+
+        except Exception as e:
+            self.logger.error(f"Error reading response cache: {e}")
+            return None
+
+    def set(self, key: bytes, response_data: Dict[str, Any]) -> None:
+        """Store response data under the given key."""
+        try:
+            response = json.dumps(response_data, ensure_ascii=False, default=str)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, created_at, response) VALUES (?, ?, ?)",
+                    (key, time.time(), response)
+                )
+                self._conn.commit()
+
+        except Exception as e:
+            self.logger.error(f"Error writing response cache: {e}")
+
+    def purge_expired(self) -> None:
+        """Remove all expired entries."""
+        if self.ttl_seconds is None:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
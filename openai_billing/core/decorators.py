@@ -4,12 +4,18 @@ Decorators for monitoring OpenAI API calls.
 
 import functools
 import inspect
-from typing import Any, Callable, Dict, Optional, Union
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Union
+
+from pydantic import BaseModel
 
 from .billing_monitor import BillingMonitor
 from .token_counter import TokenCounter
 from .exceptions import BillingException
 
+if TYPE_CHECKING:
+    from openai import Stream
+
 
 # Global billing monitor instance
 _global_monitor: Optional[BillingMonitor] = None
@@ -32,7 +38,8 @@ def get_global_monitor() -> BillingMonitor:
 def monitor_openai_call(model_name: Optional[str] = None, 
                        monitor: Optional[BillingMonitor] = None,
                        pre_check: bool = True,
-                       raise_on_limit: bool = True):
+                       raise_on_limit: bool = True,
+                       capture_args: bool = False):
     """
     Decorator to monitor OpenAI API calls.
     
@@ -41,6 +48,8 @@ def monitor_openai_call(model_name: Optional[str] = None,
         monitor: Billing monitor instance. If None, uses global monitor.
         pre_check: Whether to check limits before making the request.
         raise_on_limit: Whether to raise exceptions when limits are exceeded.
+        capture_args: Whether to pass the call's args and kwargs to the monitor as
+            request data. Off by default, since they hold the full prompt payload.
     
     Usage:
         @monitor_openai_call(model_name="gpt-4")
@@ -54,6 +63,9 @@ def monitor_openai_call(model_name: Optional[str] = None,
     """
     
     def decorator(func: Callable) -> Callable:
+        # Resolve where the model and payload arguments live once, not on every call
+        model_index, model_default = _find_model_parameter(func)
+        payload_name, payload_index = _find_payload_parameter(func)
         
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -66,17 +78,20 @@ def monitor_openai_call(model_name: Optional[str] = None,
             # Extract model name
             actual_model_name = model_name
             if actual_model_name is None:
-                actual_model_name = _extract_model_name(func, args, kwargs)
+                actual_model_name = _extract_model_name(args, kwargs, model_index, model_default)
             
             if not actual_model_name:
                 # If we can't determine the model, just run the function
                 return func(*args, **kwargs)
             
-            # Pre-check limits if enabled
-            if pre_check:
+            # Pre-check limits if enabled (nothing to check, or tokenize, without limits)
+            if pre_check and billing_monitor.has_any_limit():
                 try:
                     # Estimate tokens for pre-check
-                    estimated_tokens = _estimate_request_tokens(func, args, kwargs, actual_model_name, billing_monitor.token_counter)
+                    estimated_tokens = _estimate_request_tokens(
+                        args, kwargs, actual_model_name, billing_monitor.token_counter,
+                        payload_name, payload_index
+                    )
                     
                     check_result = billing_monitor.check_limits_before_request(actual_model_name, estimated_tokens)
                     
@@ -95,24 +110,21 @@ def monitor_openai_call(model_name: Optional[str] = None,
             try:
                 result = func(*args, **kwargs)
                 
+                # Streamed responses report usage in their last chunk; track it once the stream ends
+                if _is_openai_stream(result):
+                    return _TrackedStream(result, billing_monitor, actual_model_name, raise_on_limit)
+                
                 # Track the usage after successful call
                 try:
-                    if hasattr(result, 'model_dump'):
-                        # Pydantic model
-                        response_data = result.model_dump()
-                    elif hasattr(result, 'to_dict'):
-                        # OpenAI response object
-                        response_data = result.to_dict()
-                    elif isinstance(result, dict):
-                        # Already a dictionary
-                        response_data = result
-                    else:
-                        # Try to convert to dict
-                        response_data = dict(result) if result else {}
+                    response_data = _to_response_dict(result)
+                    
+                    request_data = {"function": func.__name__}
+                    if capture_args:
+                        request_data["args"] = args
+                        request_data["kwargs"] = kwargs
                     
                     usage_info = billing_monitor.track_openai_response(
-                        response_data, actual_model_name, 
-                        {"function": func.__name__, "args": args, "kwargs": kwargs}
+                        response_data, actual_model_name, request_data
                     )
                     
                     # Attach usage info to result if possible
@@ -136,66 +148,224 @@ def monitor_openai_call(model_name: Optional[str] = None,
     return decorator
 
 
-def _extract_model_name(func: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+def _is_openai_stream(result: Any) -> bool:
+    """Check for an OpenAI Stream without importing the SDK just for the check."""
+    # A Stream can only exist once the SDK has been imported by whoever created it
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(result, openai.Stream)
+
+
+class _TrackedStream:
+    """
+    Iterates an OpenAI stream and tracks its usage when the stream ends.
+    
+    Usage is only reported by the API when the request sets
+    ``stream_options={"include_usage": True}``. Other attributes are passed
+    through to the wrapped stream.
+    """
+    
+    def __init__(self, stream: "Stream", billing_monitor: BillingMonitor, model_name: str,
+                 raise_on_limit: bool = True):
+        self._stream = stream
+        self._billing_monitor = billing_monitor
+        self._model_name = model_name
+        self._raise_on_limit = raise_on_limit
+        # Latest usage reported by this stream: (input, output, cached input), or None
+        self._usage: Optional[Tuple[int, int, int]] = None
+        self._iterator = self._track_chunks()
+    
+    def _track_chunks(self):
+        try:
+            for chunk in self._stream:
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    # Usage is cumulative; servers reporting it on every chunk
+                    # (e.g. vLLM's continuous usage stats) mustn't be summed
+                    details = getattr(usage, "prompt_tokens_details", None)
+                    self._usage = (
+                        usage.prompt_tokens,
+                        usage.completion_tokens or 0,
+                        getattr(details, "cached_tokens", None) or 0
+                    )
+                yield chunk
+            
+            if self._usage is None:
+                self._billing_monitor.logger.warning(
+                    "Streamed response reported no usage; pass "
+                    "stream_options={'include_usage': True} to track it"
+                )
+        finally:
+            try:
+                if self._usage is not None:
+                    input_tokens, output_tokens, cached_input_tokens = self._usage
+                    self._billing_monitor.track_usage(
+                        self._model_name, input_tokens, output_tokens,
+                        cached_input_tokens=cached_input_tokens
+                    )
+            except Exception as e:
+                self._billing_monitor.logger.error(f"Error tracking usage: {e}")
+                if self._raise_on_limit:
+                    raise
+    
+    def __iter__(self):
+        return self._iterator
+    
+    def __next__(self):
+        return next(self._iterator)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self) -> None:
+        """Close the stream, tracking any usage it has reported so far."""
+        self._iterator.close()
+        self._stream.close()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+@functools.singledispatch
+def _to_response_dict(result: Any) -> Dict[str, Any]:
+    """Convert the result of a wrapped API call to a response dictionary."""
+    if hasattr(result, 'model_dump'):
+        return result.model_dump()
+    if hasattr(result, 'to_dict'):
+        # OpenAI response object
+        return result.to_dict()
+    # Try to convert to dict
+    return dict(result) if result else {}
+
+
+@_to_response_dict.register(BaseModel)
+def _pydantic_response_dict(result: BaseModel) -> Dict[str, Any]:
+    # OpenAI v1 responses are Pydantic models
+    return result.model_dump()
+
+
+@_to_response_dict.register(dict)
+def _plain_response_dict(result: dict) -> Dict[str, Any]:
+    # Already a dictionary
+    return result
+
+
+def _find_model_parameter(func: Callable) -> Tuple[Optional[int], Any]:
+    """
+    Locate the ``model`` parameter of a function.
+    
+    Returns:
+        Tuple of (positional index or None if it can't be passed positionally,
+        default value or None)
+    """
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None, None
+    
+    for index, param in enumerate(parameters):
+        if param.name == 'model':
+            default = None if param.default is param.empty else param.default
+            if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                return index, default
+            return None, default
+    
+    return None, None
+
+
+def _extract_model_name(args: tuple, kwargs: dict, model_index: Optional[int],
+                        model_default: Any = None) -> Optional[str]:
     """Extract model name from function arguments."""
     
     # Check kwargs first
     if 'model' in kwargs:
         return kwargs['model']
     
-    # Check positional arguments
-    try:
-        sig = inspect.signature(func)
-        bound_args = sig.bind(*args, **kwargs)
-        bound_args.apply_defaults()
-        
-        if 'model' in bound_args.arguments:
-            return bound_args.arguments['model']
-    except Exception:
-        pass
+    # Check positional arguments, then the parameter's default
+    if model_index is not None and len(args) > model_index:
+        return args[model_index]
+    if model_default is not None:
+        return model_default
     
     # Try common parameter names
-    for param_name in ['model', 'model_name', 'engine']:
+    for param_name in ['model_name', 'engine']:
         if param_name in kwargs:
             return kwargs[param_name]
     
     return None
 
 
-def _estimate_request_tokens(func: Callable, args: tuple, kwargs: dict, 
-                           model_name: str, token_counter: TokenCounter) -> int:
+# Request parameters carrying the text sent to the model, in lookup order
+_PAYLOAD_PARAMETERS = ('messages', 'prompt', 'input')
+
+
+def _find_payload_parameter(func: Callable) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Find which request payload parameter a function declares.
+    
+    Returns:
+        Tuple of (parameter name or None, positional index or None)
+    """
+    try:
+        parameters = list(inspect.signature(func).parameters.values())
+    except (TypeError, ValueError):
+        return None, None
+    
+    names = [param.name for param in parameters]
+    for name in _PAYLOAD_PARAMETERS:
+        if name in names:
+            index = names.index(name)
+            if parameters[index].kind in (inspect.Parameter.POSITIONAL_ONLY,
+                                          inspect.Parameter.POSITIONAL_OR_KEYWORD):
+                return name, index
+            return name, None
+    
+    return None, None
+
+
+def _count_payload_tokens(name: str, value: Any, model_name: str,
+                          token_counter: TokenCounter) -> Optional[int]:
+    """Count the tokens of a request payload, or return None if it has an unexpected shape."""
+    if name == 'messages':
+        # Chat completions
+        if isinstance(value, list):
+            return token_counter.count_messages_tokens(value, model_name)
+        return None
+    
+    # Completion prompts and embedding inputs
+    if isinstance(value, str):
+        return token_counter.count_tokens(value, model_name)
+    if isinstance(value, list):
+        return sum(token_counter.count_tokens(text, model_name) for text in value if isinstance(text, str))
+    return None
+
+
+def _estimate_request_tokens(args: tuple, kwargs: dict, model_name: str, token_counter: TokenCounter,
+                             payload_name: Optional[str] = None,
+                             payload_index: Optional[int] = None) -> int:
     """Estimate tokens for a request."""
     
     try:
-        # Look for messages parameter (chat completions)
-        if 'messages' in kwargs:
-            messages = kwargs['messages']
-            if isinstance(messages, list):
-                return token_counter.count_messages_tokens(messages, model_name)
-        
-        # Look for prompt parameter (completions)
-        if 'prompt' in kwargs:
-            prompt = kwargs['prompt']
-            if isinstance(prompt, str):
-                return token_counter.count_tokens(prompt, model_name)
-            elif isinstance(prompt, list):
-                total_tokens = 0
-                for p in prompt:
-                    if isinstance(p, str):
-                        total_tokens += token_counter.count_tokens(p, model_name)
-                return total_tokens
+        # Payload parameter declared by the wrapped function (may be passed positionally)
+        if payload_name is not None:
+            if payload_name in kwargs:
+                value = kwargs[payload_name]
+            elif payload_index is not None and len(args) > payload_index:
+                value = args[payload_index]
+            else:
+                value = None
+            tokens = _count_payload_tokens(payload_name, value, model_name, token_counter)
+            if tokens is not None:
+                return tokens
         
-        # Look for input parameter (embeddings)
-        if 'input' in kwargs:
-            input_text = kwargs['input']
-            if isinstance(input_text, str):
-                return token_counter.count_tokens(input_text, model_name)
-            elif isinstance(input_text, list):
-                total_tokens = 0
-                for text in input_text:
-                    if isinstance(text, str):
-                        total_tokens += token_counter.count_tokens(text, model_name)
-                return total_tokens
+        # Payload passed through **kwargs
+        for name in _PAYLOAD_PARAMETERS:
+            if name in kwargs:
+                tokens = _count_payload_tokens(name, kwargs[name], model_name, token_counter)
+                if tokens is not None:
+                    return tokens
         
         # Default estimation
         return 100  # Conservative estimate
@@ -2,15 +2,70 @@
 Token counting utilities for different models and providers.
 """
 
+import hashlib
+import os
+import threading
 import tiktoken
-from typing import Optional, Dict, Any, List, Union
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
 from .exceptions import TokenCountingException
 
+# Batch encoding starts a thread pool per call, which only pays off for large payloads
+_BATCH_THREADS = min(8, os.cpu_count() or 1)
+_BATCH_MIN_CHARS = 32_768
+
+
+# Message formatting token costs (tokens_per_message, tokens_per_name), based on
+# OpenAI's documentation; the first matching rule wins
+_MESSAGE_FORMAT_RULES = (
+    (lambda name: name.startswith("gpt-4"), (3, 1)),
+    (lambda name: name.startswith("gpt-3.5-turbo") and ("0613" in name or "16k" in name), (3, 1)),
+    (lambda name: name.startswith("gpt-3.5-turbo"), (4, -1)),  # If there's a name, subtract 1 token
+)
+_DEFAULT_MESSAGE_FORMAT = (3, 1)
+
+
+@lru_cache(maxsize=256)
+def _message_format(model_name: str) -> Tuple[int, int]:
+    """Resolve the message formatting token costs for a model."""
+    for matches, costs in _MESSAGE_FORMAT_RULES:
+        if matches(model_name):
+            return costs
+    return _DEFAULT_MESSAGE_FORMAT
+
+
+@lru_cache(maxsize=None)
+def _encoder_for(encoding_name: str) -> tiktoken.Encoding:
+    """Load a tiktoken encoding once and share it across all TokenCounter instances."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def _message_key(encoding_name: str, strict: bool, parts: Tuple[str, ...]) -> bytes:
+    """
+    Build the message cache key (a 16-byte blake2b digest) for a message's texts.
+    
+    Only the digest is kept, so cached counts don't hold on to the prompts.
+    """
+    digest = hashlib.blake2b(f"{encoding_name}\0{int(strict)}".encode("utf-8"), digest_size=16)
+    for part in parts:
+        data = part.encode("utf-8", "surrogatepass")
+        # Length prefixes keep ("ab", "c") and ("a", "bc") apart
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.digest()
+
 
 class TokenCounter:
-    """Utility class for counting tokens in different formats."""
+    """
+    Utility class for counting tokens in different formats.
+    
+    tiktoken downloads each encoding's BPE file on first use and caches it on
+    disk; set the ``TIKTOKEN_CACHE_DIR`` environment variable to control (or
+    pre-populate, e.g. in a container image) that cache location.
+    """
     
-    # Model encoding mappings
+    # Default model encoding mappings; each instance works on its own copy
     MODEL_ENCODINGS = {
         # OpenAI models
         "gpt-4": "cl100k_base",
@@ -40,28 +95,54 @@ class TokenCounter:
         "baichuan2-turbo-192k": "cl100k_base",
     }
     
-    def __init__(self):
-        self._encoders: Dict[str, tiktoken.Encoding] = {}
+    def __init__(self, preload: bool = False, message_cache_size: int = 1024):
+        """
+        Initialize the token counter.
+        
+        Args:
+            preload: Load every encoding used by MODEL_ENCODINGS now, so the first
+                     count doesn't pay the encoding load cost. Loaded encodings are
+                     shared by all instances; those that fail to load are retried
+                     (and reported) on first use.
+            message_cache_size: Number of per-message token counts to keep, so a
+                                growing chat history only encodes its new messages.
+                                0 disables the cache.
+        """
+        self.MODEL_ENCODINGS = dict(type(self).MODEL_ENCODINGS)
+        
+        self.message_cache_size = message_cache_size
+        self._message_cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._message_cache_lock = threading.Lock()
+        
+        if preload:
+            for encoding_name in set(self.MODEL_ENCODINGS.values()):
+                try:
+                    _encoder_for(encoding_name)
+                except Exception:
+                    pass
     
     def _get_encoder(self, model_name: str) -> tiktoken.Encoding:
         """Get or create an encoder for the specified model."""
         encoding_name = self.MODEL_ENCODINGS.get(model_name, "cl100k_base")
         
-        if encoding_name not in self._encoders:
-            try:
-                self._encoders[encoding_name] = tiktoken.get_encoding(encoding_name)
-            except Exception as e:
-                raise TokenCountingException(f"Failed to get encoding for {encoding_name}: {e}")
-        
-        return self._encoders[encoding_name]
+        try:
+            return _encoder_for(encoding_name)
+        except Exception as e:
+            raise TokenCountingException(f"Failed to get encoding for {encoding_name}: {e}")
     
-    def count_tokens(self, text: str, model_name: str) -> int:
+    def count_tokens(self, text: str, model_name: str, allow_special: bool = False) -> int:
         """
         Count tokens in a text string for a specific model.
         
+        By default the text is encoded as ordinary text, which skips the scan for
+        special tokens: sequences like ``<|endoftext|>`` are counted as the plain
+        text they are.
+        
         Args:
             text: The text to count tokens for
             model_name: The name of the model
+            allow_special: Count special-token sequences as the single special
+                           tokens they encode to
             
         Returns:
             Number of tokens
@@ -71,17 +152,25 @@ class TokenCounter:
         
         try:
             encoder = self._get_encoder(model_name)
-            return len(encoder.encode(text))
+            if allow_special:
+                return len(encoder.encode(text, allowed_special="all"))
+            return len(encoder.encode_ordinary(text))
         except Exception as e:
             raise TokenCountingException(f"Failed to count tokens: {e}")
     
-    def count_messages_tokens(self, messages: List[Dict[str, Any]], model_name: str) -> int:
+    def count_messages_tokens(self, messages: List[Dict[str, Any]], model_name: str,
+                              strict: bool = False) -> int:
         """
         Count tokens in a list of messages (OpenAI format).
         
+        By default the fields of each message are joined and encoded in one
+        call, which may differ from the exact count by a token here and there.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             model_name: The name of the model
+            strict: Encode every field separately for the exact count
+                    documented by OpenAI
             
         Returns:
             Number of tokens including message formatting overhead
@@ -93,84 +182,151 @@ class TokenCounter:
             encoder = self._get_encoder(model_name)
             
             # Different models have different token counting rules
-            if model_name.startswith("gpt-4") or model_name.startswith("gpt-3.5"):
-                return self._count_openai_messages_tokens(messages, encoder, model_name)
+            if model_name.startswith(("gpt-4", "gpt-3.5")):
+                return self._count_openai_messages_tokens(messages, encoder, model_name, strict)
             else:
                 # For other models, use a simpler approximation
-                return self._count_generic_messages_tokens(messages, encoder)
+                return self._count_generic_messages_tokens(messages, encoder, strict)
                 
         except Exception as e:
             raise TokenCountingException(f"Failed to count message tokens: {e}")
     
     def _count_openai_messages_tokens(self, messages: List[Dict[str, Any]], 
-                                    encoder: tiktoken.Encoding, model_name: str) -> int:
+                                    encoder: tiktoken.Encoding, model_name: str,
+                                    strict: bool = False) -> int:
         """Count tokens for OpenAI-style messages with proper formatting."""
-        
-        # Token costs for message formatting (based on OpenAI's documentation)
-        if model_name.startswith("gpt-4"):
-            tokens_per_message = 3
-            tokens_per_name = 1
-        elif model_name.startswith("gpt-3.5-turbo"):
-            if "0613" in model_name or "16k" in model_name:
-                tokens_per_message = 3
-                tokens_per_name = 1
-            else:
-                tokens_per_message = 4
-                tokens_per_name = -1  # If there's a name, subtract 1 token
-        else:
-            tokens_per_message = 3
-            tokens_per_name = 1
+        tokens_per_message, tokens_per_name = _message_format(model_name)
         
         num_tokens = 0
+        message_parts: List[Tuple[str, ...]] = []
         
         for message in messages:
             num_tokens += tokens_per_message
+            parts: List[str] = []
             
             for key, value in message.items():
                 if key == "content":
                     if isinstance(value, str):
-                        num_tokens += len(encoder.encode(value))
+                        parts.append(value)
                     elif isinstance(value, list):
                         # Handle multi-modal content
                         for content_item in value:
                             if isinstance(content_item, dict) and "text" in content_item:
-                                num_tokens += len(encoder.encode(content_item["text"]))
+                                parts.append(content_item["text"])
                 elif key == "role":
-                    num_tokens += len(encoder.encode(value))
+                    parts.append(value)
                 elif key == "name":
-                    num_tokens += len(encoder.encode(value))
+                    parts.append(value)
                     if tokens_per_name > 0:
                         num_tokens += tokens_per_name
+            
+            message_parts.append(tuple(parts))
         
         # Add tokens for the assistant's reply
         num_tokens += 3
         
-        return num_tokens
+        return num_tokens + self._count_message_parts_tokens(message_parts, encoder, strict)
     
     def _count_generic_messages_tokens(self, messages: List[Dict[str, Any]], 
-                                     encoder: tiktoken.Encoding) -> int:
+                                     encoder: tiktoken.Encoding, strict: bool = False) -> int:
         """Count tokens for generic message format (approximation)."""
-        num_tokens = 0
+        message_parts: List[Tuple[str, ...]] = []
         
         for message in messages:
+            parts: List[str] = []
+            
             # Add tokens for role
             if "role" in message:
-                num_tokens += len(encoder.encode(message["role"]))
+                parts.append(message["role"])
             
             # Add tokens for content
             if "content" in message:
                 content = message["content"]
                 if isinstance(content, str):
-                    num_tokens += len(encoder.encode(content))
+                    parts.append(content)
                 elif isinstance(content, list):
                     for item in content:
                         if isinstance(item, dict) and "text" in item:
-                            num_tokens += len(encoder.encode(item["text"]))
+                            parts.append(item["text"])
             
-            # Add overhead for message formatting
-            num_tokens += 4  # Approximate overhead per message
+            message_parts.append(tuple(parts))
         
-        return num_tokens
+        # Add overhead for message formatting (approximate overhead per message)
+        num_tokens = 4 * len(messages)
+        
+        return num_tokens + self._count_message_parts_tokens(message_parts, encoder, strict)
+    
+    def _count_message_parts_tokens(self, message_parts: List[Tuple[str, ...]],
+                                    encoder: tiktoken.Encoding, strict: bool) -> int:
+        """
+        Count the tokens of each message's text fields.
+        
+        Unless strict, a message's fields are joined with newlines and encoded
+        in a single pass. Per-message counts are kept in an LRU cache keyed on
+        a digest of the texts, so only messages not seen recently are encoded.
+        """
+        keys = [_message_key(encoder.name, strict, parts) for parts in message_parts]
+        counts: Dict[bytes, int] = {}
+        
+        with self._message_cache_lock:
+            for key in keys:
+                count = self._message_cache.get(key)
+                if count is not None:
+                    self._message_cache.move_to_end(key)
+                    counts[key] = count
+        
+        pending = {key: parts for key, parts in zip(keys, message_parts) if key not in counts}
+        if pending:
+            texts: List[str] = []
+            owners = []
+            for key, parts in pending.items():
+                if strict or len(parts) < 2:
+                    counts[key] = 0
+                else:
+                    # Each newline separator encodes to about one token
+                    counts[key] = 1 - len(parts)
+                    parts = ("\n".join(parts),)
+                texts.extend(parts)
+                owners.extend([key] * len(parts))
+            
+            for key, length in zip(owners, self._encode_lengths(texts, encoder)):
+                counts[key] += length
+            
+            if self.message_cache_size > 0:
+                with self._message_cache_lock:
+                    for key in pending:
+                        self._message_cache[key] = counts[key]
+                    while len(self._message_cache) > self.message_cache_size:
+                        self._message_cache.popitem(last=False)
+        
+        return sum(counts[key] for key in keys)
+    
+    def clear_message_cache(self) -> None:
+        """Drop all cached per-message token counts."""
+        with self._message_cache_lock:
+            self._message_cache.clear()
+    
+    @staticmethod
+    def _encode_lengths(texts: List[str], encoder: tiktoken.Encoding) -> Iterator[int]:
+        """
+        Get the token count of each of several strings with one encoder.
+        
+        The counts are produced lazily, so summing them never builds a list.
+        Texts are encoded as ordinary text, without the special-token scan.
+        
+        Small payloads are encoded inline; large ones go through
+        ``encode_ordinary_batch``, which spreads the BPE work over a thread
+        pool (tiktoken releases the GIL while encoding).
+        """
+        if len(texts) < 2 or sum(map(len, texts)) < _BATCH_MIN_CHARS:
+            return map(len, map(encoder.encode_ordinary, texts))
+        
+        num_threads = min(_BATCH_THREADS, len(texts))
+        return map(len, encoder.encode_ordinary_batch(texts, num_threads=num_threads))
+    
+    def _count_texts_tokens(self, texts: List[str], encoder: tiktoken.Encoding) -> int:
+        """Count the total tokens of several strings with one encoder."""
+        return sum(self._encode_lengths(texts, encoder))
     
     def estimate_tokens_from_response(self, response_data: Dict[str, Any], 
                                     model_name: str) -> tuple[int, int]:
@@ -196,26 +352,43 @@ class TokenCounter:
             input_tokens = 0
             output_tokens = 0
             
-            # Estimate output tokens from choices
-            choices = response_data.get("choices", [])
-            for choice in choices:
-                message = choice.get("message", {})
-                content = message.get("content", "")
+            # Estimate output tokens from choices, encoding all contents together
+            texts = []
+            for choice in response_data.get("choices", []):
+                content = (choice.get("message") or {}).get("content")
                 if content:
-                    output_tokens += self.count_tokens(content, model_name)
+                    texts.append(content)
+            
+            if texts:
+                encoder = self._get_encoder(model_name)
+                output_tokens = self._count_texts_tokens(texts, encoder)
             
             return input_tokens, output_tokens
             
         except Exception as e:
             raise TokenCountingException(f"Failed to estimate tokens from response: {e}")
     
+    def get_cached_tokens_from_response(self, response_data: Dict[str, Any]) -> int:
+        """
+        Get the number of prompt tokens served from the prompt cache.
+        
+        Args:
+            response_data: The API response data
+            
+        Returns:
+            Number of cached input tokens, or 0 if the response doesn't report any
+        """
+        usage = response_data.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        return details.get("cached_tokens") or 0
+    
     def get_supported_models(self) -> List[str]:
         """Get list of supported model names."""
-        return list(self.MODEL_ENCODINGS.keys())
+        return list(self.MODEL_ENCODINGS)
     
     def add_model_encoding(self, model_name: str, encoding_name: str) -> None:
         """
-        Add a custom model encoding mapping.
+        Add a custom model encoding mapping for this counter.
         
         Args:
             model_name: Name of the model
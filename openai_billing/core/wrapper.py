@@ -2,13 +2,59 @@
 OpenAI API wrapper with billing monitoring.
 """
 
-from typing import Any, Optional, Dict, List, Union
-import openai
-from openai import OpenAI
+import hashlib
+from functools import lru_cache
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Dict, List, Tuple, Union
 
 from .billing_monitor import BillingMonitor
+from .cache import ResponseCache
 from .decorators import monitor_openai_call, get_global_monitor
 
+# The OpenAI SDK is imported where it's used, so importing this module (e.g. for
+# the monitoring context managers) doesn't load it
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+@lru_cache(maxsize=32)
+def _get_openai_client(api_key: Optional[str], client_kwargs: Tuple[Tuple[str, Any], ...]) -> "OpenAI":
+    """Create one OpenAI client per configuration, so its connection pool can be shared."""
+    from openai import OpenAI
+    
+    return OpenAI(api_key=api_key, **dict(client_kwargs))
+
+
+@lru_cache(maxsize=8)
+def _get_response_cache(db_path: Path, ttl_seconds: Optional[float]) -> ResponseCache:
+    """Open one response cache per database file and TTL, shared by all wrappers."""
+    return ResponseCache(db_path, ttl_seconds=ttl_seconds)
+
+
+# Client methods wrapped with billing monitoring, as attribute paths
+_MONITORED_METHODS = ("chat.completions.create", "completions.create", "embeddings.create")
+
+
+def _monitor_client_methods(client: "OpenAI", billing_monitor: BillingMonitor) -> None:
+    """
+    Replace the client's create methods with monitored versions.
+    
+    The bound methods are decorated directly, so a call goes straight from the
+    monitoring wrapper to the client. Methods the client doesn't have are skipped.
+    """
+    monitor = monitor_openai_call(monitor=billing_monitor)
+    
+    for path in _MONITORED_METHODS:
+        parent_path, _, method_name = path.rpartition(".")
+        try:
+            parent = attrgetter(parent_path)(client)
+            original = getattr(parent, method_name)
+        except AttributeError:
+            continue
+        
+        setattr(parent, method_name, monitor(original))
+
 
 class OpenAIWrapper:
     """
@@ -21,6 +67,8 @@ class OpenAIWrapper:
     def __init__(self, 
                  api_key: Optional[str] = None,
                  billing_monitor: Optional[BillingMonitor] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 share_client: bool = True,
                  **client_kwargs):
         """
         Initialize the OpenAI wrapper.
@@ -28,55 +76,100 @@ class OpenAIWrapper:
         Args:
             api_key: OpenAI API key. If None, uses environment variable.
             billing_monitor: Billing monitor instance. If None, uses global monitor.
+            response_cache: Cache for identical chat completion requests. If None,
+                           one is created when caching is enabled in the billing config.
+            share_client: Reuse the HTTP connection pool of other wrappers created
+                          with the same api_key and client arguments. Pass False
+                          when the client must not share connections, e.g. if it
+                          will be closed independently.
             **client_kwargs: Additional arguments for OpenAI client.
         """
         self.billing_monitor = billing_monitor or get_global_monitor()
         
+        config = self.billing_monitor.config
+        if response_cache is None and config.cache_enabled:
+            response_cache = _get_response_cache(
+                self.billing_monitor.config_manager.cache_file,
+                config.cache_ttl_seconds
+            )
+        self.response_cache = response_cache
+        
         # Initialize OpenAI client
-        client_args = {}
-        if api_key is not None:
-            client_args['api_key'] = api_key
-        client_args.update(client_kwargs)
+        self.client = None
+        if share_client:
+            try:
+                # copy() shares the cached client's connection pool but gets its
+                # own resources, so wrapping them doesn't affect other wrappers
+                shared_client = _get_openai_client(api_key, tuple(sorted(client_kwargs.items())))
+                self.client = shared_client.copy()
+            except TypeError:
+                # Unhashable client arguments (e.g. a headers dict) can't be cached
+                pass
         
-        self.client = OpenAI(**client_args)
+        if self.client is None:
+            from openai import OpenAI
+            
+            client_args = {}
+            if api_key is not None:
+                client_args['api_key'] = api_key
+            client_args.update(client_kwargs)
+            
+            self.client = OpenAI(**client_args)
         
         # Wrap the completions and chat completions
         self._wrap_client_methods()
+        
+        # Bind the hot resources on the instance so calls like
+        # wrapper.chat.completions.create(...) don't go through __getattr__
+        self.chat = self.client.chat
+        self.completions = getattr(self.client, 'completions', None)
+        self.embeddings = getattr(self.client, 'embeddings', None)
     
     def _wrap_client_methods(self):
         """Wrap OpenAI client methods with billing monitoring."""
+        _monitor_client_methods(self.client, self.billing_monitor)
         
-        # Wrap chat completions
-        original_chat_create = self.client.chat.completions.create
-        
-        @monitor_openai_call(monitor=self.billing_monitor)
-        def monitored_chat_create(*args, **kwargs):
-            return original_chat_create(*args, **kwargs)
+        # Cache hits are served before the monitored call
+        if self.response_cache is not None:
+            completions = self.client.chat.completions
+            completions.create = self._cached(completions.create)
+    
+    def _cached(self, create_func):
+        """
+        Serve identical chat completion requests from the response cache.
         
-        self.client.chat.completions.create = monitored_chat_create
+        Cache hits skip the API call and therefore aren't tracked or billed.
+        Streaming requests always go to the API.
+        """
+        cache = self.response_cache
+        scope = self._cache_scope()
         
-        # Wrap completions (if available)
-        if hasattr(self.client, 'completions'):
-            original_completions_create = self.client.completions.create
+        def cached_create(*args, **kwargs):
+            if args or kwargs.get("stream"):
+                return create_func(*args, **kwargs)
             
-            @monitor_openai_call(monitor=self.billing_monitor)
-            def monitored_completions_create(*args, **kwargs):
-                return original_completions_create(*args, **kwargs)
+            key = cache.make_key(kwargs, scope)
+            cached_response = cache.get(key)
+            if cached_response is not None:
+                from openai.types.chat import ChatCompletion
+                
+                return ChatCompletion.model_validate(cached_response)
             
-            self.client.completions.create = monitored_completions_create
+            response = create_func(*args, **kwargs)
+            if hasattr(response, 'model_dump'):
+                cache.set(key, response.model_dump(mode="json"))
+            return response
         
-        # Wrap embeddings
-        if hasattr(self.client, 'embeddings'):
-            original_embeddings_create = self.client.embeddings.create
-            
-            @monitor_openai_call(monitor=self.billing_monitor)
-            def monitored_embeddings_create(*args, **kwargs):
-                return original_embeddings_create(*args, **kwargs)
-            
-            self.client.embeddings.create = monitored_embeddings_create
+        return cached_create
+    
+    def _cache_scope(self) -> str:
+        """Identify the client's endpoint and account for response cache keys."""
+        credentials = f"{self.client.api_key}\0{self.client.organization or ''}"
+        credentials_hash = hashlib.blake2b(credentials.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{self.client.base_url}\0{credentials_hash}"
     
     def __getattr__(self, name: str) -> Any:
-        """Delegate attribute access to the wrapped client."""
+        """Delegate attribute access to the wrapped client (for less used attributes)."""
         return getattr(self.client, name)
     
     def get_usage_summary(self) -> Dict[str, Any]:
@@ -95,6 +188,21 @@ class OpenAIWrapper:
         """Estimate cost for given token usage."""
         return self.billing_monitor.estimate_cost(model_name, input_tokens, output_tokens)
     
+    def estimate_cost_batch(self, model_names: List[str], input_tokens: List[int],
+                            output_tokens: List[int]) -> List[float]:
+        """
+        Estimate costs for many potential requests at once.
+        
+        Args:
+            model_names: Model of each request
+            input_tokens: Input tokens of each request
+            output_tokens: Output tokens of each request
+            
+        Returns:
+            Estimated cost in USD for each request (0.0 for unconfigured models)
+        """
+        return self.billing_monitor.estimate_cost_batch(list(zip(model_names, input_tokens, output_tokens)))
+    
     def set_threshold_callbacks(self, 
                                on_warning: Optional[callable] = None,
                                on_exceeded: Optional[callable] = None,
@@ -120,8 +228,8 @@ def create_monitored_client(api_key: Optional[str] = None,
     return OpenAIWrapper(api_key=api_key, billing_monitor=billing_monitor, **client_kwargs)
 
 
-def patch_openai_client(client: OpenAI, 
-                       billing_monitor: Optional[BillingMonitor] = None) -> OpenAI:
+def patch_openai_client(client: "OpenAI", 
+                       billing_monitor: Optional[BillingMonitor] = None) -> "OpenAI":
     """
     Patch an existing OpenAI client with billing monitoring.
     
@@ -132,70 +240,41 @@ def patch_openai_client(client: OpenAI,
     Returns:
         The patched client (same instance)
     """
-    monitor = billing_monitor or get_global_monitor()
-    
-    # Wrap chat completions
-    original_chat_create = client.chat.completions.create
-    
-    @monitor_openai_call(monitor=monitor)
-    def monitored_chat_create(*args, **kwargs):
-        return original_chat_create(*args, **kwargs)
-    
-    client.chat.completions.create = monitored_chat_create
-    
-    # Wrap completions (if available)
-    if hasattr(client, 'completions'):
-        original_completions_create = client.completions.create
-        
-        @monitor_openai_call(monitor=monitor)
-        def monitored_completions_create(*args, **kwargs):
-            return original_completions_create(*args, **kwargs)
-        
-        client.completions.create = monitored_completions_create
-    
-    # Wrap embeddings
-    if hasattr(client, 'embeddings'):
-        original_embeddings_create = client.embeddings.create
-        
-        @monitor_openai_call(monitor=monitor)
-        def monitored_embeddings_create(*args, **kwargs):
-            return original_embeddings_create(*args, **kwargs)
-        
-        client.embeddings.create = monitored_embeddings_create
-    
+    _monitor_client_methods(client, billing_monitor or get_global_monitor())
     return client
 
 
-# Context manager for temporary monitoring
-class temporary_monitoring:
-    """Context manager for temporary billing monitoring."""
+class _MonitoringSwitch:
+    """Context manager that sets whether monitoring is enabled and restores it on exit."""
+    
+    enabled = True
     
     def __init__(self, billing_monitor: Optional[BillingMonitor] = None):
         self.billing_monitor = billing_monitor or get_global_monitor()
         self.original_enabled = None
     
     def __enter__(self):
-        self.original_enabled = self.billing_monitor.config.enabled
-        self.billing_monitor.config.enabled = True
+        config = self.billing_monitor.config
+        self.original_enabled = config.enabled
+        # Only write when the state actually changes, e.g. not in nested blocks
+        if self.original_enabled != self.enabled:
+            config.enabled = self.enabled
         return self.billing_monitor
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.original_enabled is not None:
-            self.billing_monitor.config.enabled = self.original_enabled
+        config = self.billing_monitor.config
+        if self.original_enabled is not None and config.enabled != self.original_enabled:
+            config.enabled = self.original_enabled
 
 
-class disable_monitoring:
-    """Context manager for temporarily disabling monitoring."""
-    
-    def __init__(self, billing_monitor: Optional[BillingMonitor] = None):
-        self.billing_monitor = billing_monitor or get_global_monitor()
-        self.original_enabled = None
+# Context manager for temporary monitoring
+class temporary_monitoring(_MonitoringSwitch):
+    """Context manager for temporary billing monitoring."""
     
-    def __enter__(self):
-        self.original_enabled = self.billing_monitor.config.enabled
-        self.billing_monitor.config.enabled = False
-        return self.billing_monitor
+    enabled = True
+
+
+class disable_monitoring(_MonitoringSwitch):
+    """Context manager for temporarily disabling monitoring."""
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.original_enabled is not None:
-            self.billing_monitor.config.enabled = self.original_enabled
+    enabled = False
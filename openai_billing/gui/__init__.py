@@ -1,7 +1,32 @@
 """GUI components for the billing monitor."""
 
-from .main import BillingGUI, main
-from .config_window import ConfigWindow
-from .stats_window import StatsWindow
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .main import BillingGUI, main
+    from .config_window import ConfigWindow
+    from .stats_window import StatsWindow
 
 __all__ = ["BillingGUI", "main", "ConfigWindow", "StatsWindow"]
+
+# The windows import tkinter, so they're only loaded when accessed
+_LAZY_IMPORTS = {
+    "BillingGUI": ".main",
+    "main": ".main",
+    "ConfigWindow": ".config_window",
+    "StatsWindow": ".stats_window",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -2,18 +2,84 @@
 Configuration window for the billing monitor GUI.
 """
 
+import math
+import re
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from typing import Optional
+from tkinter import font as tkfont
+from typing import Any, Dict, Optional, Tuple
 
 from ..core.billing_monitor import BillingMonitor
 from ..models.billing_models import ModelConfig, ThresholdConfig
-from ..config.default_configs import get_available_models
+from ..config.default_configs import get_available_models, get_default_model_configs
+
+# Unsigned decimal numbers with an optional exponent, including the partial
+# values passed through while typing one (e.g. ".", "1e", "1e-")
+_FLOAT_PREFIX_RE = re.compile(r"\d*\.?\d*([eE][-+]?\d*)?")
+
+
+# Usage limit rows: (ThresholdConfig field, label, variable type, default limit)
+_THRESHOLD_SPEC = (
+    ("daily_cost_limit", "Daily cost limit ($):", tk.DoubleVar, 10.0),
+    ("monthly_cost_limit", "Monthly cost limit ($):", tk.DoubleVar, 100.0),
+    ("daily_token_limit", "Daily token limit:", tk.IntVar, 1000000),
+    ("monthly_token_limit", "Monthly token limit:", tk.IntVar, 10000000),
+)
+
+
+class OptionalValueEntry:
+    """
+    A checkbox-enabled entry holding an optional value.
+    
+    The Tk variables exist from construction, so the value can be set and read
+    before (or without) the widgets being built.
+    """
+    
+    def __init__(self, var_type: type = tk.DoubleVar, default: Any = 0):
+        self.default = default
+        self.enabled_var = tk.BooleanVar()
+        self.value_var = var_type()
+        self.entry: Optional[ttk.Entry] = None
+    
+    def build(self, parent: tk.Misc, label: str) -> ttk.Frame:
+        """Create the checkbox and entry in a new frame (not yet packed)."""
+        frame = ttk.Frame(parent)
+        
+        ttk.Checkbutton(
+            frame, 
+            text=label, 
+            variable=self.enabled_var,
+            command=self.update_state
+        ).pack(side='left')
+        
+        self.entry = ttk.Entry(frame, textvariable=self.value_var, width=10)
+        self.entry.pack(side='right')
+        
+        self.update_state()
+        return frame
+    
+    def get(self) -> Any:
+        """Get the value, or None when the checkbox is off."""
+        return self.value_var.get() if self.enabled_var.get() else None
+    
+    def set(self, value: Any) -> None:
+        """Set the value; None turns the checkbox off and shows the default."""
+        self.enabled_var.set(value is not None)
+        self.value_var.set(self.default if value is None else value)
+        self.update_state()
+    
+    def update_state(self) -> None:
+        """Enable or disable the entry to match the checkbox."""
+        if self.entry is not None:
+            self.entry.config(state='normal' if self.enabled_var.get() else 'disabled')
 
 
 class ConfigWindow:
     """Configuration window for managing billing settings."""
     
+    # Number of new model rows from which the tree is hidden while they're inserted
+    BULK_INSERT_ROWS = 20
+    
     def __init__(self, parent: tk.Tk, billing_monitor: BillingMonitor):
         self.parent = parent
         self.billing_monitor = billing_monitor
@@ -25,6 +91,9 @@ class ConfigWindow:
         self.window.transient(parent)
         self.window.grab_set()
         
+        # Shared by all section headings; kept on self so it is not garbage collected
+        self._heading_font = tkfont.Font(self.window, family='Arial', size=12, weight='bold')
+        
         # Variables
         self.setup_variables()
         
@@ -44,18 +113,19 @@ class ConfigWindow:
         self.enabled_var = tk.BooleanVar()
         self.auto_save_var = tk.BooleanVar()
         
-        # Threshold variables
-        self.daily_cost_limit_var = tk.DoubleVar()
-        self.monthly_cost_limit_var = tk.DoubleVar()
-        self.daily_token_limit_var = tk.IntVar()
-        self.monthly_token_limit_var = tk.IntVar()
+        # Threshold limits, by ThresholdConfig field
+        self.limit_entries = {
+            field: OptionalValueEntry(var_type, default)
+            for field, _, var_type, default in _THRESHOLD_SPEC
+        }
         self.warning_threshold_var = tk.DoubleVar()
         
-        # Enable/disable threshold variables
-        self.daily_cost_enabled_var = tk.BooleanVar()
-        self.monthly_cost_enabled_var = tk.BooleanVar()
-        self.daily_token_enabled_var = tk.BooleanVar()
-        self.monthly_token_enabled_var = tk.BooleanVar()
+        # Widgets of the models tab, built on first selection
+        self.models_tree = None
+        self._reload_scheduled = False
+        
+        # Add/edit dialog, created on first use and reused afterwards
+        self._model_dialog = None
     
     def create_widgets(self):
         """Create all widgets."""
@@ -68,7 +138,7 @@ class ConfigWindow:
         self.notebook.add(self.general_frame, text="General")
         
         # General settings
-        ttk.Label(self.general_frame, text="General Settings", font=('Arial', 12, 'bold')).pack(anchor='w', pady=(0, 10))
+        ttk.Label(self.general_frame, text="General Settings", font=self._heading_font).pack(anchor='w', pady=(0, 10))
         
         ttk.Checkbutton(
             self.general_frame, 
@@ -86,13 +156,16 @@ class ConfigWindow:
         self.thresholds_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.thresholds_frame, text="Thresholds")
         
-        self.create_thresholds_widgets()
-        
         # Models tab
         self.models_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.models_frame, text="Models")
         
-        self.create_models_widgets()
+        # The other tabs are filled in the first time they're selected
+        self._tab_builders = {
+            str(self.thresholds_frame): self.create_thresholds_widgets,
+            str(self.models_frame): self.create_models_widgets,
+        }
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
         
         # Buttons frame
         self.buttons_frame = ttk.Frame(self.window, padding="10")
@@ -118,79 +191,10 @@ class ConfigWindow:
     def create_thresholds_widgets(self):
         """Create threshold configuration widgets."""
         
-        ttk.Label(self.thresholds_frame, text="Usage Limits", font=('Arial', 12, 'bold')).pack(anchor='w', pady=(0, 10))
-        
-        # Daily cost limit
-        daily_cost_frame = ttk.Frame(self.thresholds_frame)
-        daily_cost_frame.pack(fill='x', pady=5)
-        
-        ttk.Checkbutton(
-            daily_cost_frame, 
-            text="Daily cost limit ($):", 
-            variable=self.daily_cost_enabled_var,
-            command=self.toggle_daily_cost_limit
-        ).pack(side='left')
-        
-        self.daily_cost_entry = ttk.Entry(
-            daily_cost_frame, 
-            textvariable=self.daily_cost_limit_var,
-            width=10
-        )
-        self.daily_cost_entry.pack(side='right')
-        
-        # Monthly cost limit
-        monthly_cost_frame = ttk.Frame(self.thresholds_frame)
-        monthly_cost_frame.pack(fill='x', pady=5)
-        
-        ttk.Checkbutton(
-            monthly_cost_frame, 
-            text="Monthly cost limit ($):", 
-            variable=self.monthly_cost_enabled_var,
-            command=self.toggle_monthly_cost_limit
-        ).pack(side='left')
-        
-        self.monthly_cost_entry = ttk.Entry(
-            monthly_cost_frame, 
-            textvariable=self.monthly_cost_limit_var,
-            width=10
-        )
-        self.monthly_cost_entry.pack(side='right')
-        
-        # Daily token limit
-        daily_token_frame = ttk.Frame(self.thresholds_frame)
-        daily_token_frame.pack(fill='x', pady=5)
-        
-        ttk.Checkbutton(
-            daily_token_frame, 
-            text="Daily token limit:", 
-            variable=self.daily_token_enabled_var,
-            command=self.toggle_daily_token_limit
-        ).pack(side='left')
-        
-        self.daily_token_entry = ttk.Entry(
-            daily_token_frame, 
-            textvariable=self.daily_token_limit_var,
-            width=10
-        )
-        self.daily_token_entry.pack(side='right')
+        ttk.Label(self.thresholds_frame, text="Usage Limits", font=self._heading_font).pack(anchor='w', pady=(0, 10))
         
-        # Monthly token limit
-        monthly_token_frame = ttk.Frame(self.thresholds_frame)
-        monthly_token_frame.pack(fill='x', pady=5)
-        
-        ttk.Checkbutton(
-            monthly_token_frame, 
-            text="Monthly token limit:", 
-            variable=self.monthly_token_enabled_var,
-            command=self.toggle_monthly_token_limit
-        ).pack(side='left')
-        
-        self.monthly_token_entry = ttk.Entry(
-            monthly_token_frame, 
-            textvariable=self.monthly_token_limit_var,
-            width=10
-        )
-        self.monthly_token_entry.pack(side='right')
+        for field, label, _, _ in _THRESHOLD_SPEC:
+            self.limit_entries[field].build(self.thresholds_frame, label).pack(fill='x', pady=5)
         
         # Warning threshold
         warning_frame = ttk.Frame(self.thresholds_frame)
@@ -207,7 +211,7 @@ class ConfigWindow:
     def create_models_widgets(self):
         """Create model configuration widgets."""
         
-        ttk.Label(self.models_frame, text="Model Configurations", font=('Arial', 12, 'bold')).pack(anchor='w', pady=(0, 10))
+        ttk.Label(self.models_frame, text="Model Configurations", font=self._heading_font).pack(anchor='w', pady=(0, 10))
         
         # Models list frame
         models_list_frame = ttk.Frame(self.models_frame)
@@ -231,12 +235,17 @@ class ConfigWindow:
         self.models_tree.column('output_price', width=100)
         self.models_tree.column('max_tokens', width=100)
         
+        # Rendered rows by model name: (item id, model config, values), so reloads
+        # only touch changes. ModelConfig is immutable, so an unchanged instance
+        # means an unchanged row and needs no re-formatting.
+        self._tree_items: Dict[str, Tuple[str, ModelConfig, tuple]] = {}
+        
         # Scrollbar for treeview
-        models_scrollbar = ttk.Scrollbar(models_list_frame, orient='vertical', command=self.models_tree.yview)
-        self.models_tree.configure(yscrollcommand=models_scrollbar.set)
+        self.models_scrollbar = ttk.Scrollbar(models_list_frame, orient='vertical', command=self.models_tree.yview)
+        self.models_tree.configure(yscrollcommand=self.models_scrollbar.set)
         
         self.models_tree.pack(side='left', fill='both', expand=True)
-        models_scrollbar.pack(side='right', fill='y')
+        self.models_scrollbar.pack(side='right', fill='y')
         
         # Buttons for model management
         models_buttons_frame = ttk.Frame(self.models_frame)
@@ -265,6 +274,14 @@ class ConfigWindow:
             text="Load Defaults", 
             command=self.load_default_models
         ).pack(side='right')
+        
+        self.load_models()
+    
+    def _on_tab_changed(self, event=None):
+        """Build a tab's widgets the first time it's selected."""
+        builder = self._tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
     
     def setup_layout(self):
         """Setup widget layout."""
@@ -299,98 +316,82 @@ class ConfigWindow:
         # Thresholds
         thresholds = config.thresholds
         
-        if thresholds.daily_cost_limit is not None:
-            self.daily_cost_enabled_var.set(True)
-            self.daily_cost_limit_var.set(thresholds.daily_cost_limit)
-        else:
-            self.daily_cost_enabled_var.set(False)
-            self.daily_cost_limit_var.set(10.0)
-        
-        if thresholds.monthly_cost_limit is not None:
-            self.monthly_cost_enabled_var.set(True)
-            self.monthly_cost_limit_var.set(thresholds.monthly_cost_limit)
-        else:
-            self.monthly_cost_enabled_var.set(False)
-            self.monthly_cost_limit_var.set(100.0)
-        
-        if thresholds.daily_token_limit is not None:
-            self.daily_token_enabled_var.set(True)
-            self.daily_token_limit_var.set(thresholds.daily_token_limit)
-        else:
-            self.daily_token_enabled_var.set(False)
-            self.daily_token_limit_var.set(1000000)
-        
-        if thresholds.monthly_token_limit is not None:
-            self.monthly_token_enabled_var.set(True)
-            self.monthly_token_limit_var.set(thresholds.monthly_token_limit)
-        else:
-            self.monthly_token_enabled_var.set(False)
-            self.monthly_token_limit_var.set(10000000)
+        for field, limit_entry in self.limit_entries.items():
+            limit_entry.set(getattr(thresholds, field))
         
         self.warning_threshold_var.set(thresholds.warning_threshold * 100)  # Convert to percentage
         
-        # Update entry states
-        self.toggle_daily_cost_limit()
-        self.toggle_monthly_cost_limit()
-        self.toggle_daily_token_limit()
-        self.toggle_monthly_token_limit()
-        
         # Load models
         self.load_models()
+        
+        # Remember what was loaded, so saving an unchanged form skips the disk write
+        self._loaded_snapshot = self._config_snapshot()
     
     def load_models(self):
-        """Load models into the treeview."""
-        # Clear existing items
-        for item in self.models_tree.get_children():
-            self.models_tree.delete(item)
-        
-        # Add models
-        for name, model_config in self.billing_monitor.config.models.items():
-            self.models_tree.insert(
-                '', 'end',
-                text=name,
-                values=(
+        """Sync the treeview with the configured models, updating only changed rows."""
+        if self.models_tree is None:
+            # The Models tab hasn't been opened yet; it loads the models when built
+            return
+        
+        models = self.billing_monitor.config.models
+        
+        # Remove models that are no longer configured
+        for name in self._tree_items.keys() - models.keys():
+            self.models_tree.delete(self._tree_items.pop(name)[0])
+        
+        # Hide the tree while adding many rows (e.g. loading the defaults), so Tk
+        # lays it out once when it's shown again rather than as rows come in
+        bulk_insert = len(models.keys() - self._tree_items.keys()) >= self.BULK_INSERT_ROWS
+        if bulk_insert:
+            self.models_tree.pack_forget()
+        
+        try:
+            # Add new models and update changed ones
+            for name, model_config in models.items():
+                row = self._tree_items.get(name)
+                if row is not None and row[1] is model_config:
+                    continue
+                
+                values = (
                     f"{model_config.input_token_price:.6f}",
                     f"{model_config.output_token_price:.6f}",
                     model_config.max_tokens or "N/A"
                 )
-            )
+                
+                if row is None:
+                    item = self.models_tree.insert('', 'end', text=name, values=values)
+                    self._tree_items[name] = (item, model_config, values)
+                else:
+                    if row[2] != values:
+                        self.models_tree.item(row[0], values=values)
+                    self._tree_items[name] = (row[0], model_config, values)
+        finally:
+            if bulk_insert:
+                self.models_tree.pack(side='left', fill='both', expand=True, before=self.models_scrollbar)
     
-    def toggle_daily_cost_limit(self):
-        """Toggle daily cost limit entry."""
-        if self.daily_cost_enabled_var.get():
-            self.daily_cost_entry.config(state='normal')
-        else:
-            self.daily_cost_entry.config(state='disabled')
-    
-    def toggle_monthly_cost_limit(self):
-        """Toggle monthly cost limit entry."""
-        if self.monthly_cost_enabled_var.get():
-            self.monthly_cost_entry.config(state='normal')
-        else:
-            self.monthly_cost_entry.config(state='disabled')
+    def _schedule_reload(self):
+        """Sync the models tree once, after the current batch of edits is handled."""
+        if not self._reload_scheduled:
+            self._reload_scheduled = True
+            self.window.after_idle(self._do_reload)
     
-    def toggle_daily_token_limit(self):
-        """Toggle daily token limit entry."""
-        if self.daily_token_enabled_var.get():
-            self.daily_token_entry.config(state='normal')
-        else:
-            self.daily_token_entry.config(state='disabled')
+    def _do_reload(self):
+        """Run a scheduled models tree sync."""
+        self._reload_scheduled = False
+        self.load_models()
     
-    def toggle_monthly_token_limit(self):
-        """Toggle monthly token limit entry."""
-        if self.monthly_token_enabled_var.get():
-            self.monthly_token_entry.config(state='normal')
-        else:
-            self.monthly_token_entry.config(state='disabled')
+    def _get_model_dialog(self) -> 'ModelConfigDialog':
+        """Get the pooled model dialog, creating it on first use."""
+        if self._model_dialog is None:
+            self._model_dialog = ModelConfigDialog(self.window)
+        return self._model_dialog
     
     def add_model(self):
         """Add a new model configuration."""
-        dialog = ModelConfigDialog(self.window, "Add Model")
-        if dialog.result:
-            model_config = dialog.result
+        model_config = self._get_model_dialog().open("Add Model")
+        if model_config:
             self.billing_monitor.config.add_model_config(model_config)
-            self.load_models()
+            self._schedule_reload()
     
     def edit_model(self):
         """Edit selected model configuration."""
@@ -404,11 +405,16 @@ class ConfigWindow:
         model_config = self.billing_monitor.config.get_model_config(model_name)
         
         if model_config:
-            dialog = ModelConfigDialog(self.window, "Edit Model", model_config)
-            if dialog.result:
-                updated_config = dialog.result
+            updated_config = self._get_model_dialog().open("Edit Model", model_config)
+            if updated_config:
                 self.billing_monitor.config.add_model_config(updated_config)
-                self.load_models()
+                self._schedule_reload()
+    
+    def _confirm(self, title: str, message: str) -> bool:
+        """Ask for confirmation, unless the config skips confirmations."""
+        if self.billing_monitor.config.skip_confirmations:
+            return True
+        return messagebox.askyesno(title, message)
     
     def remove_model(self):
         """Remove selected model configuration."""
@@ -420,45 +426,34 @@ class ConfigWindow:
         item = selection[0]
         model_name = self.models_tree.item(item, 'text')
         
-        if messagebox.askyesno("Confirm Removal", f"Remove model '{model_name}' configuration?"):
+        if self._confirm("Confirm Removal", f"Remove model '{model_name}' configuration?"):
             if model_name in self.billing_monitor.config.models:
                 del self.billing_monitor.config.models[model_name]
-                self.load_models()
+                self._schedule_reload()
     
     def load_default_models(self):
         """Load default model configurations."""
-        if messagebox.askyesno("Confirm Load", "Load default model configurations? This will overwrite existing configurations."):
-            from ..config.default_configs import get_default_model_configs
-            default_configs = get_default_model_configs()
-            self.billing_monitor.config.models.update(default_configs)
-            self.load_models()
+        if self._confirm("Confirm Load", "Load default model configurations? This will overwrite existing configurations."):
+            # The defaults are a shared read-only mapping; update() copies the entries
+            self.billing_monitor.config.models.update(get_default_model_configs())
+            self._schedule_reload()
     
     def reset_to_defaults(self):
         """Reset all settings to defaults."""
-        if messagebox.askyesno("Confirm Reset", "Reset all settings to defaults?"):
+        if self._confirm("Confirm Reset", "Reset all settings to defaults?"):
             # Reset to default values
             self.enabled_var.set(True)
             self.auto_save_var.set(True)
             
-            self.daily_cost_enabled_var.set(True)
-            self.daily_cost_limit_var.set(10.0)
-            
-            self.monthly_cost_enabled_var.set(True)
-            self.monthly_cost_limit_var.set(100.0)
-            
-            self.daily_token_enabled_var.set(True)
-            self.daily_token_limit_var.set(1000000)
-            
-            self.monthly_token_enabled_var.set(True)
-            self.monthly_token_limit_var.set(10000000)
+            for limit_entry in self.limit_entries.values():
+                limit_entry.set(limit_entry.default)
             
             self.warning_threshold_var.set(80.0)
-            
-            # Update entry states
-            self.toggle_daily_cost_limit()
-            self.toggle_monthly_cost_limit()
-            self.toggle_daily_token_limit()
-            self.toggle_monthly_token_limit()
+    
+    def _config_snapshot(self) -> tuple:
+        """Get the settings this window edits, in a comparable form."""
+        config = self.billing_monitor.config
+        return config.enabled, config.auto_save, config.thresholds, tuple(config.models.items())
     
     def save_configuration(self):
         """Save the configuration."""
@@ -468,18 +463,17 @@ class ConfigWindow:
             self.billing_monitor.config.auto_save = self.auto_save_var.get()
             
             # Update thresholds
+            limits = {field: limit_entry.get() for field, limit_entry in self.limit_entries.items()}
             thresholds = ThresholdConfig(
-                daily_cost_limit=self.daily_cost_limit_var.get() if self.daily_cost_enabled_var.get() else None,
-                monthly_cost_limit=self.monthly_cost_limit_var.get() if self.monthly_cost_enabled_var.get() else None,
-                daily_token_limit=self.daily_token_limit_var.get() if self.daily_token_enabled_var.get() else None,
-                monthly_token_limit=self.monthly_token_limit_var.get() if self.monthly_token_enabled_var.get() else None,
+                **limits,
                 warning_threshold=self.warning_threshold_var.get() / 100  # Convert from percentage
             )
             
             self.billing_monitor.config.thresholds = thresholds
             
-            # Save configuration
-            self.billing_monitor.config_manager.save_config(self.billing_monitor.config)
+            # Save configuration, unless nothing changed since it was loaded
+            if self._config_snapshot() != self._loaded_snapshot:
+                self.billing_monitor.config_manager.save_config(self.billing_monitor.config)
             
             messagebox.showinfo("Success", "Configuration saved successfully.")
             self.window.destroy()
@@ -489,19 +483,24 @@ class ConfigWindow:
 
 
 class ModelConfigDialog:
-    """Dialog for adding/editing model configurations."""
+    """
+    Dialog for adding/editing model configurations.
+    
+    The dialog is built once and hidden between uses; call open() for each
+    add or edit.
+    """
     
-    def __init__(self, parent: tk.Toplevel, title: str, model_config: Optional[ModelConfig] = None):
+    def __init__(self, parent: tk.Toplevel):
         self.parent = parent
-        self.model_config = model_config
+        self.model_config = None
         self.result = None
         
-        # Create dialog
+        # Create dialog, hidden until open()
         self.dialog = tk.Toplevel(parent)
-        self.dialog.title(title)
+        self.dialog.withdraw()
         self.dialog.geometry("400x300")
         self.dialog.transient(parent)
-        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
         
         # Variables
         self.name_var = tk.StringVar()
@@ -510,32 +509,91 @@ class ModelConfigDialog:
         self.max_tokens_var = tk.IntVar()
         self.max_tokens_enabled_var = tk.BooleanVar()
         
+        # Set when the dialog is closed; open() waits on it
+        self._done_var = tk.BooleanVar(value=False)
+        self.dialog.bind('<Destroy>', self._on_destroy)
+        
         # Create widgets
         self.create_widgets()
+    
+    def open(self, title: str, model_config: Optional[ModelConfig] = None) -> Optional[ModelConfig]:
+        """
+        Show the dialog and wait until it is closed.
+        
+        Args:
+            title: Dialog title
+            model_config: Configuration to edit, or None to add a new one
+            
+        Returns:
+            The saved model configuration, or None if the dialog was cancelled
+        """
+        self.model_config = model_config
+        self.result = None
+        self.dialog.title(title)
         
-        # Load existing data if editing
+        # Load existing data if editing, otherwise start from empty fields
         if model_config:
             self.load_model_config()
+        else:
+            self.reset()
         
-        # Center dialog
+        self.dialog.deiconify()
         self.center_dialog()
+        self.dialog.grab_set()
+        
+        self._done_var.set(False)
+        self.dialog.wait_variable(self._done_var)
+        
+        if self.dialog.winfo_exists():
+            self.dialog.grab_release()
+            self.dialog.withdraw()
+        return self.result
+    
+    def reset(self):
+        """Clear the fields for a new model."""
+        self.name_var.set("")
+        self.input_price_var.set(0.0)
+        self.output_price_var.set(0.0)
+        self.max_tokens_var.set(0)
+        self.max_tokens_enabled_var.set(False)
+        self.toggle_max_tokens()
+    
+    def cancel(self):
+        """Close the dialog without saving."""
+        self.result = None
+        self._done_var.set(True)
+    
+    def _on_destroy(self, event):
+        """Release a pending open() if the dialog is destroyed with its parent."""
+        if event.widget is self.dialog:
+            self._done_var.set(True)
     
     def create_widgets(self):
         """Create dialog widgets."""
         main_frame = ttk.Frame(self.dialog, padding="20")
         main_frame.pack(fill='both', expand=True)
         
+        # Reject malformed keystrokes up front instead of failing in save()
+        float_vcmd = (self.dialog.register(self._is_float), '%P')
+        int_vcmd = (self.dialog.register(self._is_int), '%P')
+        
         # Model name
         ttk.Label(main_frame, text="Model Name:").grid(row=0, column=0, sticky='w', pady=5)
         ttk.Entry(main_frame, textvariable=self.name_var, width=30).grid(row=0, column=1, sticky='ew', pady=5, padx=(10, 0))
         
         # Input token price
         ttk.Label(main_frame, text="Input Token Price ($/1000):").grid(row=1, column=0, sticky='w', pady=5)
-        ttk.Entry(main_frame, textvariable=self.input_price_var, width=30).grid(row=1, column=1, sticky='ew', pady=5, padx=(10, 0))
+        ttk.Entry(
+            main_frame, textvariable=self.input_price_var, width=30,
+            validate='key', validatecommand=float_vcmd
+        ).grid(row=1, column=1, sticky='ew', pady=5, padx=(10, 0))
         
         # Output token price
         ttk.Label(main_frame, text="Output Token Price ($/1000):").grid(row=2, column=0, sticky='w', pady=5)
-        ttk.Entry(main_frame, textvariable=self.output_price_var, width=30).grid(row=2, column=1, sticky='ew', pady=5, padx=(10, 0))
+        ttk.Entry(
+            main_frame, textvariable=self.output_price_var, width=30,
+            validate='key', validatecommand=float_vcmd
+        ).grid(row=2, column=1, sticky='ew', pady=5, padx=(10, 0))
         
         # Max tokens
         ttk.Checkbutton(
@@ -545,7 +603,10 @@ class ModelConfigDialog:
             command=self.toggle_max_tokens
         ).grid(row=3, column=0, sticky='w', pady=5)
         
-        self.max_tokens_entry = ttk.Entry(main_frame, textvariable=self.max_tokens_var, width=30)
+        self.max_tokens_entry = ttk.Entry(
+            main_frame, textvariable=self.max_tokens_var, width=30,
+            validate='key', validatecommand=int_vcmd
+        )
         self.max_tokens_entry.grid(row=3, column=1, sticky='ew', pady=5, padx=(10, 0))
         
         # Buttons
@@ -553,11 +614,21 @@ class ModelConfigDialog:
         buttons_frame.grid(row=4, column=0, columnspan=2, pady=20)
         
         ttk.Button(buttons_frame, text="Save", command=self.save).pack(side='right', padx=(5, 0))
-        ttk.Button(buttons_frame, text="Cancel", command=self.dialog.destroy).pack(side='right')
+        ttk.Button(buttons_frame, text="Cancel", command=self.cancel).pack(side='right')
         
         # Configure grid weights
         main_frame.columnconfigure(1, weight=1)
     
+    @staticmethod
+    def _is_float(proposed: str) -> bool:
+        """Entry validator: accept anything that can be typed on the way to a float."""
+        return _FLOAT_PREFIX_RE.fullmatch(proposed) is not None
+    
+    @staticmethod
+    def _is_int(proposed: str) -> bool:
+        """Entry validator: accept an empty field or a plain integer."""
+        return not proposed or proposed.isdigit()
+    
     def toggle_max_tokens(self):
         """Toggle max tokens entry."""
         if self.max_tokens_enabled_var.get():
@@ -599,34 +670,47 @@ class ModelConfigDialog:
     
     def save(self):
         """Save the model configuration."""
+        name = self.name_var.get().strip()
+        if not name:
+            messagebox.showerror("Error", "Model name is required.")
+            return
+        
+        # The entries only accept numeric keystrokes, but an empty or unfinished
+        # value (e.g. "1e") still fails to convert
         try:
-            name = self.name_var.get().strip()
-            if not name:
-                messagebox.showerror("Error", "Model name is required.")
-                return
-            
             input_price = self.input_price_var.get()
             output_price = self.output_price_var.get()
-            
-            if input_price < 0 or output_price < 0:
-                messagebox.showerror("Error", "Prices cannot be negative.")
-                return
-            
-            max_tokens = None
-            if self.max_tokens_enabled_var.get():
+        except tk.TclError:
+            messagebox.showerror("Error", "Prices must be valid numbers.")
+            return
+        if not (math.isfinite(input_price) and math.isfinite(output_price)):
+            messagebox.showerror("Error", "Prices must be finite numbers.")
+            return
+        
+        if input_price < 0 or output_price < 0:
+            messagebox.showerror("Error", "Prices cannot be negative.")
+            return
+        
+        max_tokens = None
+        if self.max_tokens_enabled_var.get():
+            try:
                 max_tokens = self.max_tokens_var.get()
-                if max_tokens <= 0:
-                    messagebox.showerror("Error", "Max tokens must be positive.")
-                    return
-            
-            self.result = ModelConfig(
-                name=name,
-                input_token_price=input_price,
-                output_token_price=output_price,
-                max_tokens=max_tokens
-            )
-            
-            self.dialog.destroy()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save model configuration: {e}")
+            except tk.TclError:
+                max_tokens = 0
+            if max_tokens <= 0:
+                messagebox.showerror("Error", "Max tokens must be positive.")
+                return
+        
+        values = dict(
+            name=name,
+            input_token_price=input_price,
+            output_token_price=output_price,
+            max_tokens=max_tokens
+        )
+        if self.model_config:
+            # Keep the fields the dialog doesn't edit, such as the cached input price
+            self.result = self.model_config.model_copy(update=values)
+        else:
+            self.result = ModelConfig(**values)
+        
+        self._done_var.set(True)
@@ -4,8 +4,6 @@ Main GUI application for OpenAI billing monitoring.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import threading
-import time
 from datetime import datetime
 from typing import Optional
 
@@ -37,9 +35,11 @@ class BillingGUI:
         self.setup_layout()
         self.setup_bindings()
         
+        # Widget options last applied by refresh_data, keyed by widget name
+        self._last_rendered = {}
+        
         # Start auto-refresh
-        self.refresh_thread = None
-        self.refresh_running = False
+        self._after_id = None
         self.start_auto_refresh()
         
         # Initial data load
@@ -265,9 +265,9 @@ class BillingGUI:
         try:
             # Update status
             if self.billing_monitor.is_enabled():
-                self.status_label.config(text="Monitoring: Enabled", style='Success.TLabel')
+                self._render("status", self.status_label, text="Monitoring: Enabled", style='Success.TLabel')
             else:
-                self.status_label.config(text="Monitoring: Disabled", style='Warning.TLabel')
+                self._render("status", self.status_label, text="Monitoring: Disabled", style='Warning.TLabel')
             
             self.last_update_label.config(text=f"Last update: {datetime.now().strftime('%H:%M:%S')}")
             
@@ -275,17 +275,19 @@ class BillingGUI:
             summary = self.billing_monitor.get_usage_summary()
             
             # Update stats labels
-            self.stats_labels["total_cost"].config(text=f"${summary.get('total_cost', 0):.4f}")
-            self.stats_labels["daily_cost"].config(text=f"${summary.get('daily_cost', 0):.4f}")
-            self.stats_labels["monthly_cost"].config(text=f"${summary.get('monthly_cost', 0):.4f}")
-            self.stats_labels["total_requests"].config(text=f"{summary.get('total_requests', 0):,}")
-            
-            # Calculate token totals
             daily_tokens = summary.get('daily_input_tokens', 0) + summary.get('daily_output_tokens', 0)
             monthly_tokens = summary.get('monthly_input_tokens', 0) + summary.get('monthly_output_tokens', 0)
             
-            self.stats_labels["daily_tokens"].config(text=f"{daily_tokens:,}")
-            self.stats_labels["monthly_tokens"].config(text=f"{monthly_tokens:,}")
+            stats_text = {
+                "total_cost": f"${summary.get('total_cost', 0):.4f}",
+                "daily_cost": f"${summary.get('daily_cost', 0):.4f}",
+                "monthly_cost": f"${summary.get('monthly_cost', 0):.4f}",
+                "total_requests": f"{summary.get('total_requests', 0):,}",
+                "daily_tokens": f"{daily_tokens:,}",
+                "monthly_tokens": f"{monthly_tokens:,}",
+            }
+            for key, text in stats_text.items():
+                self._render(key, self.stats_labels[key], text=text)
             
             # Update progress bars
             self.update_progress_bars(summary)
@@ -295,70 +297,71 @@ class BillingGUI:
     
     def update_progress_bars(self, summary):
         """Update progress bars with current usage."""
-        
-        # Daily cost progress
-        daily_limit = summary.get('daily_cost_limit')
-        if daily_limit and daily_limit > 0:
-            daily_percent = min((summary.get('daily_cost', 0) / daily_limit) * 100, 100)
-            self.daily_cost_progress['value'] = daily_percent
-            self.daily_cost_label.config(text=f"{daily_percent:.1f}%")
+        self._update_cost_progress(
+            "daily", self.daily_cost_progress, self.daily_cost_label,
+            summary.get('daily_cost', 0), summary.get('daily_cost_limit')
+        )
+        self._update_cost_progress(
+            "monthly", self.monthly_cost_progress, self.monthly_cost_label,
+            summary.get('monthly_cost', 0), summary.get('monthly_cost_limit')
+        )
+    
+    def _update_cost_progress(self, period: str, progress: ttk.Progressbar, label: ttk.Label,
+                              cost: float, limit: Optional[float]):
+        """Update one cost progress bar and its percentage label."""
+        if limit and limit > 0:
+            percent = min((cost / limit) * 100, 100)
             
             # Change color based on usage
-            if daily_percent >= 100:
-                self.daily_cost_label.config(style='Error.TLabel')
-            elif daily_percent >= 80:
-                self.daily_cost_label.config(style='Warning.TLabel')
+            if percent >= 100:
+                style = 'Error.TLabel'
+            elif percent >= 80:
+                style = 'Warning.TLabel'
             else:
-                self.daily_cost_label.config(style='Success.TLabel')
-        else:
-            self.daily_cost_progress['value'] = 0
-            self.daily_cost_label.config(text="No limit", style='Status.TLabel')
-        
-        # Monthly cost progress
-        monthly_limit = summary.get('monthly_cost_limit')
-        if monthly_limit and monthly_limit > 0:
-            monthly_percent = min((summary.get('monthly_cost', 0) / monthly_limit) * 100, 100)
-            self.monthly_cost_progress['value'] = monthly_percent
-            self.monthly_cost_label.config(text=f"{monthly_percent:.1f}%")
+                style = 'Success.TLabel'
             
-            # Change color based on usage
-            if monthly_percent >= 100:
-                self.monthly_cost_label.config(style='Error.TLabel')
-            elif monthly_percent >= 80:
-                self.monthly_cost_label.config(style='Warning.TLabel')
-            else:
-                self.monthly_cost_label.config(style='Success.TLabel')
+            self._render(f"{period}_progress", progress, value=percent)
+            self._render(f"{period}_label", label, text=f"{percent:.1f}%", style=style)
         else:
-            self.monthly_cost_progress['value'] = 0
-            self.monthly_cost_label.config(text="No limit", style='Status.TLabel')
+            self._render(f"{period}_progress", progress, value=0)
+            self._render(f"{period}_label", label, text="No limit", style='Status.TLabel')
+    
+    def _render(self, key: str, widget, **options):
+        """Configure a widget, skipping the Tk call if the options are unchanged."""
+        if self._last_rendered.get(key) != options:
+            widget.config(**options)
+            self._last_rendered[key] = options
     
     def start_auto_refresh(self):
-        """Start auto-refresh thread."""
-        if self.auto_refresh.get() and not self.refresh_running:
-            self.refresh_running = True
-            self.refresh_thread = threading.Thread(target=self._auto_refresh_loop, daemon=True)
-            self.refresh_thread.start()
+        """Schedule the next auto-refresh on the Tk event loop."""
+        if self.auto_refresh.get() and self._after_id is None:
+            self._after_id = self.root.after(self._refresh_delay_ms(), self._tick)
     
     def stop_auto_refresh(self):
-        """Stop auto-refresh thread."""
-        self.refresh_running = False
-        if self.refresh_thread:
-            self.refresh_thread.join(timeout=1)
+        """Cancel the pending auto-refresh."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _refresh_delay_ms(self) -> int:
+        """Get the auto-refresh interval in milliseconds."""
+        try:
+            seconds = self.refresh_interval.get()
+        except tk.TclError:
+            # The spinbox is empty or being edited; keep the default interval
+            seconds = 5
+        return max(seconds, 1) * 1000
     
-    def _auto_refresh_loop(self):
-        """Auto-refresh loop running in background thread."""
-        while self.refresh_running and self.auto_refresh.get():
-            time.sleep(self.refresh_interval.get())
-            if self.refresh_running:
-                # Schedule refresh in main thread
-                self.root.after(0, self.refresh_data)
+    def _tick(self):
+        """Refresh the data and re-arm the timer while auto-refresh is on."""
+        self._after_id = None
+        self.refresh_data()
+        self.start_auto_refresh()
     
     def toggle_auto_refresh(self):
         """Toggle auto-refresh on/off."""
-        if self.auto_refresh.get():
-            self.start_auto_refresh()
-        else:
-            self.stop_auto_refresh()
+        self.stop_auto_refresh()
+        self.start_auto_refresh()
     
     def open_config(self):
         """Open configuration window."""
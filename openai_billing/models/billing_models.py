@@ -2,9 +2,9 @@
 Data models for billing configuration and usage tracking.
 """
 
-from typing import Dict, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 
 class ModelConfig(BaseModel):
@@ -13,22 +13,30 @@ class ModelConfig(BaseModel):
     name: str = Field(..., description="Model name (e.g., 'gpt-4', 'qwen-plus')")
     input_token_price: float = Field(..., description="Price per 1000 input tokens in USD")
     output_token_price: float = Field(..., description="Price per 1000 output tokens in USD")
+    cached_input_token_price: Optional[float] = Field(
+        None, description="Price per 1000 cached input tokens in USD (defaults to input price)"
+    )
     max_tokens: Optional[int] = Field(None, description="Maximum tokens for this model")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "name": "gpt-4",
                 "input_token_price": 0.03,
                 "output_token_price": 0.06,
+                "cached_input_token_price": 0.015,
                 "max_tokens": 8192
             }
         }
+    )
 
 
 class ThresholdConfig(BaseModel):
     """Threshold configuration for cost and token limits."""
     
+    model_config = ConfigDict(frozen=True)
+    
     daily_cost_limit: Optional[float] = Field(None, description="Daily cost limit in USD")
     monthly_cost_limit: Optional[float] = Field(None, description="Monthly cost limit in USD")
     daily_token_limit: Optional[int] = Field(None, description="Daily token limit")
@@ -48,6 +56,9 @@ class UsageStats(BaseModel):
     monthly_input_tokens: int = Field(default=0, description="Monthly input tokens used")
     monthly_output_tokens: int = Field(default=0, description="Monthly output tokens used")
     monthly_cost: float = Field(default=0.0, description="Monthly cost in USD")
+    total_cached_input_tokens: int = Field(default=0, description="Total input tokens served from prompt cache")
+    daily_cached_input_tokens: int = Field(default=0, description="Daily input tokens served from prompt cache")
+    monthly_cached_input_tokens: int = Field(default=0, description="Monthly input tokens served from prompt cache")
     last_reset_date: datetime = Field(default_factory=datetime.now, description="Last reset date")
     last_daily_reset: datetime = Field(default_factory=datetime.now, description="Last daily reset")
     last_monthly_reset: datetime = Field(default_factory=datetime.now, description="Last monthly reset")
@@ -56,11 +67,51 @@ class UsageStats(BaseModel):
     daily_requests: int = Field(default=0, description="Daily number of API requests")
     monthly_requests: int = Field(default=0, description="Monthly number of API requests")
     
+    # Bumped by every field assignment, so readers can cache derived data
+    _version: int = PrivateAttr(default=0)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _USAGE_STATS_FIELDS:
+            # Straight to the private storage: add_usage() assigns many fields per call
+            self.__pydantic_private__["_version"] += 1
+    
+    @property
+    def version(self) -> int:
+        """Change counter, incremented whenever a field of the stats is assigned."""
+        return self._version
+    
+    def add_usage(self, input_tokens: int, output_tokens: int, cost: float,
+                  cached_input_tokens: int = 0, requests: int = 1) -> None:
+        """Add usage to the total, daily and monthly counters in one step."""
+        # Update totals
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+        self.total_cost += cost
+        self.total_cached_input_tokens += cached_input_tokens
+        self.request_count += requests
+        self.total_requests += requests  # Keep both fields in sync
+        
+        # Update daily stats
+        self.daily_input_tokens += input_tokens
+        self.daily_output_tokens += output_tokens
+        self.daily_cost += cost
+        self.daily_cached_input_tokens += cached_input_tokens
+        self.daily_requests += requests
+        
+        # Update monthly stats
+        self.monthly_input_tokens += input_tokens
+        self.monthly_output_tokens += output_tokens
+        self.monthly_cost += cost
+        self.monthly_cached_input_tokens += cached_input_tokens
+        self.monthly_requests += requests
+    
     def reset_daily_stats(self) -> None:
         """Reset daily statistics."""
         self.daily_input_tokens = 0
         self.daily_output_tokens = 0
         self.daily_cost = 0.0
+        self.daily_cached_input_tokens = 0
         self.daily_requests = 0
         self.last_daily_reset = datetime.now()
     
@@ -69,6 +120,7 @@ class UsageStats(BaseModel):
         self.monthly_input_tokens = 0
         self.monthly_output_tokens = 0
         self.monthly_cost = 0.0
+        self.monthly_cached_input_tokens = 0
         self.monthly_requests = 0
         self.last_monthly_reset = datetime.now()
     
@@ -83,6 +135,9 @@ class UsageStats(BaseModel):
         self.monthly_input_tokens = 0
         self.monthly_output_tokens = 0
         self.monthly_cost = 0.0
+        self.total_cached_input_tokens = 0
+        self.daily_cached_input_tokens = 0
+        self.monthly_cached_input_tokens = 0
         self.request_count = 0
         self.total_requests = 0
         self.daily_requests = 0
@@ -92,6 +147,10 @@ class UsageStats(BaseModel):
         self.last_monthly_reset = datetime.now()
 
 
+# Field names of UsageStats (looking up model_fields on every assignment is slow)
+_USAGE_STATS_FIELDS = frozenset(UsageStats.model_fields)
+
+
 class BillingConfig(BaseModel):
     """Main billing configuration."""
     
@@ -100,6 +159,9 @@ class BillingConfig(BaseModel):
     usage_stats: UsageStats = Field(default_factory=UsageStats, description="Current usage statistics")
     enabled: bool = Field(default=True, description="Whether billing monitoring is enabled")
     auto_save: bool = Field(default=True, description="Automatically save usage stats")
+    cache_enabled: bool = Field(default=False, description="Cache identical chat completion requests on disk")
+    cache_ttl_seconds: int = Field(default=6 * 60 * 60, description="Lifetime of cached responses in seconds")
+    skip_confirmations: bool = Field(default=False, description="Skip the configuration window's confirmation dialogs")
     config_file_path: Optional[str] = Field(None, description="Path to configuration file")
     
     def add_model_config(self, model_config: ModelConfig) -> None:
@@ -110,50 +172,87 @@ class BillingConfig(BaseModel):
         """Get model configuration by name."""
         return self.models.get(model_name)
     
-    def calculate_cost(self, model_name: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost for given token usage."""
+    def get_model_prices(self, model_name: str) -> Optional[Tuple[float, float, float]]:
+        """Get (input, cached input, output) prices per 1000 tokens for a model."""
         model_config = self.get_model_config(model_name)
         if not model_config:
-            return 0.0
+            return None
         
-        input_cost = (input_tokens / 1000) * model_config.input_token_price
-        output_cost = (output_tokens / 1000) * model_config.output_token_price
-        return input_cost + output_cost
+        cached_price = model_config.cached_input_token_price
+        if cached_price is None:
+            cached_price = model_config.input_token_price
+        
+        return model_config.input_token_price, cached_price, model_config.output_token_price
     
-    def update_usage(self, model_name: str, input_tokens: int, output_tokens: int) -> float:
-        """Update usage statistics and return the cost."""
-        cost = self.calculate_cost(model_name, input_tokens, output_tokens)
+    @staticmethod
+    def _price_usage(prices: Tuple[float, float, float], input_tokens: int,
+                     output_tokens: int, cached_input_tokens: int) -> float:
+        """Price token usage with a (input, cached input, output) price row."""
+        input_price, cached_price, output_price = prices
+        cached_input_tokens = min(cached_input_tokens, input_tokens)
+        return ((input_tokens - cached_input_tokens) * input_price
+                + cached_input_tokens * cached_price
+                + output_tokens * output_price) / 1000
+    
+    def calculate_cost(self, model_name: str, input_tokens: int, output_tokens: int,
+                       cached_input_tokens: int = 0) -> float:
+        """
+        Calculate cost for given token usage.
         
-        # Update totals
-        self.usage_stats.total_input_tokens += input_tokens
-        self.usage_stats.total_output_tokens += output_tokens
-        self.usage_stats.total_cost += cost
-        self.usage_stats.request_count += 1
-        self.usage_stats.total_requests += 1  # Keep both fields in sync
+        ``cached_input_tokens`` is the part of ``input_tokens`` that was served
+        from the provider's prompt cache and is billed at the cached input rate.
+        """
+        prices = self.get_model_prices(model_name)
+        if prices is None:
+            return 0.0
+        return self._price_usage(prices, input_tokens, output_tokens, cached_input_tokens)
+    
+    def calculate_costs(self, usages: Iterable[Tuple[Any, ...]]) -> List[float]:
+        """
+        Calculate costs for many usages at once.
         
-        # Update daily stats
-        self.usage_stats.daily_input_tokens += input_tokens
-        self.usage_stats.daily_output_tokens += output_tokens
-        self.usage_stats.daily_cost += cost
-        self.usage_stats.daily_requests += 1
+        Each usage is a ``(model_name, input_tokens, output_tokens)`` or
+        ``(model_name, input_tokens, output_tokens, cached_input_tokens)`` tuple.
+        Prices are looked up once per distinct model.
+        """
+        price_rows: Dict[str, Optional[Tuple[float, float, float]]] = {}
+        costs = []
         
-        # Update monthly stats
-        self.usage_stats.monthly_input_tokens += input_tokens
-        self.usage_stats.monthly_output_tokens += output_tokens
-        self.usage_stats.monthly_cost += cost
-        self.usage_stats.monthly_requests += 1
+        for usage in usages:
+            model_name, input_tokens, output_tokens = usage[:3]
+            cached_input_tokens = usage[3] if len(usage) > 3 else 0
+            
+            if model_name not in price_rows:
+                price_rows[model_name] = self.get_model_prices(model_name)
+            prices = price_rows[model_name]
+            
+            if prices is None:
+                costs.append(0.0)
+            else:
+                costs.append(self._price_usage(prices, input_tokens, output_tokens, cached_input_tokens))
+        
+        return costs
+    
+    def update_usage(self, model_name: str, input_tokens: int, output_tokens: int,
+                     cached_input_tokens: int = 0) -> float:
+        """Update usage statistics and return the cost."""
+        cost = self.calculate_cost(model_name, input_tokens, output_tokens, cached_input_tokens)
+        
+        self.usage_stats.add_usage(input_tokens, output_tokens, cost, cached_input_tokens)
         
         return cost
     
-    def check_daily_reset(self) -> None:
+    def check_daily_reset(self, now: Optional[datetime] = None) -> None:
         """Check if daily stats should be reset."""
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         if now.date() > self.usage_stats.last_daily_reset.date():
             self.usage_stats.reset_daily_stats()
     
-    def check_monthly_reset(self) -> None:
+    def check_monthly_reset(self, now: Optional[datetime] = None) -> None:
         """Check if monthly stats should be reset."""
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         if (now.year > self.usage_stats.last_monthly_reset.year or 
             now.month > self.usage_stats.last_monthly_reset.month):
             self.usage_stats.reset_monthly_stats()
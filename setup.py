@@ -34,6 +34,7 @@ setup(
     ],
     extras_require={
         "gui": ["tkinter"],
+        "fast": ["orjson>=3.0"],
         "dev": ["pytest", "black", "flake8", "mypy"],
     },
     entry_points={
@@ -69,6 +69,191 @@ def test_config_manager():
         return False
 
 
+def test_default_model_configs():
+    """测试默认模型配置"""
+    print("\n🔍 测试默认模型配置...")
+    
+    import tempfile
+    from openai_billing.config import ConfigManager, get_default_model_configs
+    
+    # 默认模型配置是只读的共享映射
+    default_models = get_default_model_configs()
+    try:
+        default_models["__readonly_probe__"] = None
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("默认模型配置可以被修改")
+    assert "__readonly_probe__" not in default_models
+    
+    # 新建配置中的模型字典是独立副本
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = ConfigManager(config_dir=temp_dir).load_config()
+        assert config.models is not default_models
+        config.models.pop("gpt-4")
+        assert "gpt-4" in default_models
+    print("✅ 默认模型配置为只读共享映射")
+    
+    return True
+
+
+def test_legacy_config_cached_price():
+    """测试旧版配置文件的缓存价格"""
+    print("\n🔍 测试旧版配置文件...")
+    
+    import tempfile
+    from openai_billing.config import ConfigManager
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 旧版配置文件中的默认模型没有cached_input_token_price字段
+        config_manager = ConfigManager(config_dir=temp_dir)
+        config_manager.config_file.write_text(
+            "enabled: true\n"
+            "auto_save: true\n"
+            "models:\n"
+            "  gpt-4:\n"
+            "    name: gpt-4\n"
+            "    input_token_price: 0.03\n"
+            "    output_token_price: 0.06\n"
+            "    max_tokens: 8192\n"
+            "  my-model:\n"
+            "    name: my-model\n"
+            "    input_token_price: 0.001\n"
+            "    output_token_price: 0.002\n",
+            encoding="utf-8"
+        )
+        
+        config = config_manager.load_config()
+        assert config.models["gpt-4"].cached_input_token_price == 0.015
+        assert config.models["my-model"].cached_input_token_price is None
+        print("✅ 旧版配置沿用默认模型的缓存价格")
+    
+    return True
+
+
+def test_config_file_cache():
+    """测试配置文件的JSON缓存"""
+    print("\n🔍 测试配置文件缓存...")
+    
+    import tempfile
+    from openai_billing.config import ConfigManager
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_manager = ConfigManager(config_dir=temp_dir)
+        assert config_manager.load_config().enabled
+        assert config_manager.config_cache_file.exists()
+        
+        # 手动编辑YAML后，旧的JSON缓存不能再被使用；保留原修改时间，
+        # 模拟时间精度较粗的文件系统上同一秒内的编辑
+        config_file = config_manager.config_file
+        config_mtime = config_file.stat().st_mtime_ns
+        config_file.write_text(
+            config_file.read_text(encoding="utf-8").replace("enabled: true", "enabled: false"),
+            encoding="utf-8"
+        )
+        os.utime(config_file, ns=(config_mtime, config_mtime))
+        
+        assert not ConfigManager(config_dir=temp_dir).load_config().enabled
+        print("✅ 编辑YAML后缓存失效")
+    
+    return True
+
+
+def test_usage_stats_saving():
+    """测试使用统计的合并写入"""
+    print("\n🔍 测试使用统计写入...")
+    
+    import gc
+    import json
+    import tempfile
+    import weakref
+    from openai_billing.config import ConfigManager
+    from openai_billing.config import manager as manager_module
+    from openai_billing.models import UsageStats
+    
+    def saved_cost(config_manager):
+        return json.loads(config_manager.stats_file.read_text(encoding="utf-8"))["total_cost"]
+    
+    class RecordingLock:
+        # 记录快照是否在统计锁内获取
+        def __init__(self):
+            self.acquired = 0
+        
+        def __enter__(self):
+            self.acquired += 1
+        
+        def __exit__(self, *exc_info):
+            pass
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_manager = ConfigManager(config_dir=temp_dir)
+        config_manager.stats_flush_interval = 60
+        
+        # 空闲后的第一次更新立即写入
+        config_manager.schedule_usage_stats_save(UsageStats(total_cost=1.0))
+        assert saved_cost(config_manager) == 1.0
+        
+        # 间隔内的更新被合并，稍后一起写入（快照在统计锁内获取）
+        stats_lock = RecordingLock()
+        config_manager.schedule_usage_stats_save(UsageStats(total_cost=2.0), stats_lock)
+        config_manager.schedule_usage_stats_save(UsageStats(total_cost=3.0), stats_lock)
+        assert saved_cost(config_manager) == 1.0
+        print("✅ 频繁更新被合并写入")
+        
+        # 解释器退出时写入尚未落盘的统计
+        manager_module._flush_pending_usage_stats()
+        assert saved_cost(config_manager) == 3.0
+        assert stats_lock.acquired == 1
+        assert config_manager not in manager_module._PENDING_STATS_MANAGERS
+        print("✅ 退出时写入待保存的统计")
+        
+        # 退出钩子不会让配置管理器一直存活
+        manager_ref = weakref.ref(config_manager)
+        del config_manager
+        gc.collect()
+        assert manager_ref() is None
+        print("✅ 配置管理器可以被回收")
+    
+    return True
+
+
+def test_peek_enabled():
+    """测试只读取启用状态"""
+    print("\n🔍 测试启用状态快速读取...")
+    
+    import tempfile
+    from openai_billing.config import ConfigManager
+    
+    def edit_config(config_manager, old, new):
+        # 修改YAML并让它比JSON缓存新，避免文件系统时间精度导致读到旧缓存
+        config_file = config_manager.config_file
+        config_file.write_text(config_file.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+        cache_mtime = config_manager.config_cache_file.stat().st_mtime_ns
+        os.utime(config_file, ns=(cache_mtime + 10**9, cache_mtime + 10**9))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 配置文件不存在时回退到完整加载（并创建默认配置）
+        config_manager = ConfigManager(config_dir=temp_dir)
+        assert config_manager.peek_enabled() is True
+        assert config_manager.config_file.exists()
+        
+        # 找到enabled行时不加载完整配置
+        edit_config(config_manager, "enabled: true", "enabled: false")
+        config_manager = ConfigManager(config_dir=temp_dir)
+        assert config_manager.peek_enabled() is False
+        assert config_manager._billing_config is None
+        print("✅ 直接从enabled行读取")
+        
+        # enabled行无法解析为布尔值时回退到完整加载
+        edit_config(config_manager, "enabled: false", "enabled: 'no'")
+        config_manager = ConfigManager(config_dir=temp_dir)
+        assert config_manager.peek_enabled() is False
+        assert config_manager._billing_config is not None
+        print("✅ 无法解析时回退到完整加载")
+    
+    return True
+
+
 def test_billing_monitor():
     """测试计费监控器"""
     print("\n🔍 测试计费监控器...")
@@ -102,6 +287,30 @@ def test_billing_monitor():
         return False
 
 
+def test_usage_summary_updates():
+    """测试使用统计摘要随统计变化更新"""
+    print("\n🔍 测试使用统计摘要...")
+    
+    import tempfile
+    from openai_billing import BillingMonitor
+    from openai_billing.config import ConfigManager
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        monitor = BillingMonitor(ConfigManager(config_dir=temp_dir))
+        monitor.config.auto_save = False
+        assert monitor.get_usage_summary()["total_cost"] == 0.0
+        
+        # 直接修改统计字段后，摘要也要反映新值
+        monitor.config.usage_stats.total_cost = 42.0
+        assert monitor.get_usage_summary()["total_cost"] == 42.0
+        
+        monitor.track_usage("gpt-4o-mini", 1000, 0)
+        assert monitor.get_usage_summary()["total_requests"] == 1
+        print("✅ 摘要随统计字段更新")
+    
+    return True
+
+
 def test_token_counter():
     """测试token计数器"""
     print("\n🔍 测试token计数器...")
@@ -137,6 +346,23 @@ def test_token_counter():
         return False
 
 
+def test_custom_model_encoding():
+    """测试自定义模型编码"""
+    print("\n🔍 测试自定义模型编码...")
+    
+    from openai_billing.core import TokenCounter
+    
+    # 自定义编码只对当前实例生效（只修改映射，不加载编码器）
+    counter = TokenCounter()
+    counter.add_model_encoding("custom-model", "o200k_base")
+    assert "custom-model" in counter.get_supported_models()
+    assert "custom-model" not in TokenCounter().get_supported_models()
+    assert "custom-model" not in TokenCounter.MODEL_ENCODINGS
+    print("✅ 自定义模型编码互不影响")
+    
+    return True
+
+
 def test_model_operations():
     """测试模型操作"""
     print("\n🔍 测试模型操作...")
@@ -176,6 +402,185 @@ def test_model_operations():
         return False
 
 
+def test_cached_token_pricing():
+    """测试缓存token计费"""
+    print("\n🔍 测试缓存token计费...")
+    
+    from openai_billing.models import BillingConfig, ModelConfig
+    from openai_billing.core import TokenCounter
+    
+    config = BillingConfig()
+    config.add_model_config(ModelConfig(
+        name="test-model",
+        input_token_price=0.002,
+        output_token_price=0.004,
+        cached_input_token_price=0.001
+    ))
+    
+    # 1000输入(其中600命中缓存) + 500输出
+    cost = config.calculate_cost("test-model", 1000, 500, cached_input_tokens=600)
+    expected = 0.4 * 0.002 + 0.6 * 0.001 + 0.5 * 0.004
+    assert abs(cost - expected) <= 1e-12, f"缓存计费错误: {cost} != {expected}"
+    print(f"✅ 缓存计费成功: ${cost:.6f}")
+    
+    # 从响应中提取缓存token数
+    response = {
+        "usage": {
+            "prompt_tokens": 1000,
+            "completion_tokens": 500,
+            "prompt_tokens_details": {"cached_tokens": 600}
+        }
+    }
+    cached = TokenCounter().get_cached_tokens_from_response(response)
+    assert cached == 600, f"缓存token提取错误: {cached}"
+    print(f"✅ 缓存token提取成功: {cached}")
+    
+    return True
+
+
+def test_response_cache():
+    """测试响应缓存"""
+    print("\n🔍 测试响应缓存...")
+    
+    import tempfile
+    import time
+    from types import SimpleNamespace
+    from unittest import mock
+    from openai_billing import OpenAIWrapper
+    from openai_billing.core.cache import ResponseCache
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ResponseCache(os.path.join(temp_dir, "cache.db"), ttl_seconds=60)
+        try:
+            request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Hi"}]}
+            key = cache.make_key(request, "scope-a")
+            assert key != cache.make_key(request, "scope-b")
+            
+            # 未命中 / 命中
+            assert cache.get(key) is None
+            cache.set(key, {"id": "resp-1"})
+            assert cache.get(key) == {"id": "resp-1"}
+            print("✅ 缓存命中与未命中正常")
+            
+            # 过期条目在读取时失效，purge_expired 清除所有过期条目
+            now = time.time()
+            with mock.patch("openai_billing.core.cache.time.time", return_value=now + 120):
+                assert cache.get(key) is None
+            cache.set(key, {"id": "resp-1"})
+            with mock.patch("openai_billing.core.cache.time.time", return_value=now + 120):
+                cache.purge_expired()
+            assert cache.get(key) is None
+            print("✅ 缓存过期与清理正常")
+            
+            # 相同请求只调用一次API，流式请求绕过缓存
+            completion = {"id": "resp-1", "object": "chat.completion", "created": 0,
+                          "model": "gpt-4o-mini", "choices": []}
+            response = SimpleNamespace(model_dump=lambda mode=None: completion)
+            calls = []
+            
+            wrapper = object.__new__(OpenAIWrapper)
+            wrapper.response_cache = cache
+            wrapper.client = SimpleNamespace(base_url="https://example.com/v1", api_key="k", organization=None)
+            create = wrapper._cached(lambda **kwargs: calls.append(kwargs) or response)
+            
+            create(**request)
+            assert create(**request).id == "resp-1"
+            assert len(calls) == 1
+            create(stream=True, **request)
+            create(stream=True, **request)
+            assert len(calls) == 3
+            print("✅ 相同请求命中缓存，流式请求绕过缓存")
+        finally:
+            cache.close()
+    
+    return True
+
+
+def test_stream_tracking():
+    """测试流式响应的用量记录"""
+    print("\n🔍 测试流式响应用量记录...")
+    
+    import tempfile
+    from types import SimpleNamespace
+    from openai_billing import BillingMonitor
+    from openai_billing.config import ConfigManager
+    from openai_billing.core import ThresholdExceededException
+    from openai_billing.core.decorators import _TrackedStream
+    from openai_billing.models import ThresholdConfig
+    
+    class FakeStream:
+        def __init__(self, chunks):
+            self.chunks = chunks
+            self.closed = False
+        
+        def __iter__(self):
+            return iter(self.chunks)
+        
+        def close(self):
+            self.closed = True
+    
+    def usage_chunk(prompt_tokens, completion_tokens):
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                prompt_tokens_details=None)
+        return SimpleNamespace(usage=usage)
+    
+    text_chunk = SimpleNamespace(usage=None)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        monitor = BillingMonitor(ConfigManager(config_dir=temp_dir))
+        monitor.config.auto_save = False
+        tracked = []
+        monitor.on_usage_update = lambda info: tracked.append((info["input_tokens"], info["output_tokens"]))
+        
+        # 最后一个chunk的用量在流结束时记录一次
+        assert len(list(_TrackedStream(FakeStream([text_chunk, usage_chunk(20, 10)]), monitor, "gpt-4o-mini"))) == 2
+        assert tracked == [(20, 10)]
+        
+        # 每个chunk都报告累计用量时只记录最后一次
+        tracked.clear()
+        list(_TrackedStream(FakeStream([usage_chunk(20, 1), usage_chunk(20, 5), usage_chunk(20, 10)]),
+                            monitor, "gpt-4o-mini"))
+        assert tracked == [(20, 10)]
+        
+        # 同一模型的并发流分别记录
+        tracked.clear()
+        first = _TrackedStream(FakeStream([usage_chunk(20, 10)]), monitor, "gpt-4o-mini")
+        second = _TrackedStream(FakeStream([usage_chunk(5, 3)]), monitor, "gpt-4o-mini")
+        next(first)
+        next(second)
+        list(first)
+        list(second)
+        assert tracked == [(20, 10), (5, 3)]
+        print("✅ 流式用量按调用记录")
+        
+        # 没有用量信息时不记录
+        tracked.clear()
+        list(_TrackedStream(FakeStream([text_chunk, text_chunk]), monitor, "gpt-4o-mini"))
+        assert tracked == []
+        
+        # 提前关闭时记录已报告的用量并关闭底层流
+        stream = FakeStream([usage_chunk(20, 10), text_chunk, text_chunk])
+        tracked_stream = _TrackedStream(stream, monitor, "gpt-4o-mini")
+        next(tracked_stream)
+        tracked_stream.close()
+        assert tracked == [(20, 10)]
+        assert stream.closed
+        print("✅ 无用量与提前关闭处理正确")
+        
+        # 超出硬限制时按raise_on_limit决定是否抛出
+        monitor.config.thresholds = ThresholdConfig(daily_token_limit=1)
+        list(_TrackedStream(FakeStream([usage_chunk(20, 10)]), monitor, "gpt-4o-mini", raise_on_limit=False))
+        try:
+            list(_TrackedStream(FakeStream([usage_chunk(20, 10)]), monitor, "gpt-4o-mini"))
+        except ThresholdExceededException:
+            pass
+        else:
+            raise AssertionError("超出限制时没有抛出异常")
+        print("✅ 超出限制时按raise_on_limit处理")
+    
+    return True
+
+
 def test_decorator():
     """测试装饰器"""
     print("\n🔍 测试装饰器...")
@@ -244,9 +649,19 @@ def main():
     tests = [
         ("模块导入", test_imports),
         ("配置管理器", test_config_manager),
+        ("默认模型配置", test_default_model_configs),
+        ("旧版配置缓存价格", test_legacy_config_cached_price),
+        ("配置文件缓存", test_config_file_cache),
+        ("使用统计写入", test_usage_stats_saving),
+        ("启用状态读取", test_peek_enabled),
         ("计费监控器", test_billing_monitor),
+        ("使用统计摘要", test_usage_summary_updates),
         ("Token计数器", test_token_counter),
+        ("自定义模型编码", test_custom_model_encoding),
         ("模型操作", test_model_operations),
+        ("缓存计费", test_cached_token_pricing),
+        ("响应缓存", test_response_cache),
+        ("流式用量记录", test_stream_tracking),
         ("装饰器", test_decorator),
         ("GUI可用性", test_gui_availability),
     ]